@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.constituent_registry import get_registry
 
 # Configure the page
 st.set_page_config(
@@ -8,6 +9,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Warm the index constituent pages in the background so pages never wait on Wikipedia
+get_registry().start_background_refresh()
+
 # Main page content
 st.title("📈 Trade Ideas")
 st.markdown("""
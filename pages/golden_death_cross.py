@@ -4,9 +4,16 @@ import plotly.graph_objects as go
 from datetime import datetime
 from utils.index_data import IndexDataFetcher
 from utils.cross_analyzer import CrossAnalyzer
+from utils.cross_events import CrossEventIndex
+from utils.indicators import SCANNERS
+from utils.screener import ScreenerSnapshot, ScreenerError, screen, ALIASES
+from utils.constituent_registry import get_registry
 
 st.set_page_config(page_title="Golden & Death Cross Alerts - Trade Ideas", page_icon="⚡", layout="wide")
 
+# Start warming index constituents in case this page was opened directly
+get_registry().start_background_refresh()
+
 st.title("⚡ Golden & Death Cross Alerts")
 st.markdown("Identify stocks with recent golden cross (bullish) or death cross (bearish) signals")
 
@@ -20,6 +27,15 @@ This tool scans index constituents for stocks that have experienced these crosso
 
 st.divider()
 
+MA_PAIR_OPTIONS = {
+    'SMA 50/200': (50, 200, 'SMA'),
+    'SMA 20/50': (20, 50, 'SMA'),
+    'SMA 100/200': (100, 200, 'SMA'),
+    'EMA 12/26': (12, 26, 'EMA'),
+    'EMA 50/200': (50, 200, 'EMA'),
+    'SMA 10/40': (10, 40, 'SMA'),
+}
+
 st.subheader("Settings")
 col1, col2, col3 = st.columns(3)
 
@@ -48,8 +64,71 @@ with col3:
     st.markdown("<div style='margin-top: 26px;'></div>", unsafe_allow_html=True)
     analyze_button = st.button("🔍 Analyze", type="primary", use_container_width=True)
 
+timeframe = st.selectbox(
+    "Timeframe",
+    options=['Daily', 'Weekly', 'Monthly'],
+    help="Weekly and monthly bars are built from the stored daily prices; moving-average windows count bars of this timeframe"
+)
+
+default_pair = 'SMA 50/200' if timeframe == 'Daily' else 'SMA 10/40'
+
+selected_pairs = st.multiselect(
+    "Moving Average Pairs",
+    options=list(MA_PAIR_OPTIONS.keys()),
+    default=[default_pair],
+    help="Scan several short/long moving-average pairs in one pass over the same price data"
+)
+
+if not selected_pairs:
+    selected_pairs = [default_pair]
+
+scan_mode = st.radio(
+    "Scan Mode",
+    options=['Recent Crosses', 'Converging', 'Indicator Signals'],
+    horizontal=True,
+    help="Converging ranks stocks whose 50/200-day averages are closing in on each other and projects when they will cross; Indicator Signals runs MACD, Bollinger, momentum and 52-week-high scanners"
+)
+
+if scan_mode == 'Indicator Signals':
+    selected_scanners = st.multiselect(
+        "Indicator Scanners",
+        options=list(SCANNERS.keys()),
+        default=list(SCANNERS.keys()),
+        help="Every indicator the selected scanners need is computed once over the whole index"
+    )
+
+rsi_range = st.slider(
+    "RSI Range",
+    min_value=0,
+    max_value=100,
+    value=(0, 100),
+    help="Only show SMA 50/200 crosses whose 14-day Wilder RSI falls inside this range. "
+         "To filter the whole index by RSI, use the Screener below, e.g. `rsi < 30`"
+)
+
+volume_col1, volume_col2 = st.columns(2)
+
+with volume_col1:
+    volume_confirmation = st.checkbox(
+        "Require volume confirmation",
+        help="Only show SMA 50/200 crosses traded on above-average volume on the cross day or in the cross week"
+    )
+
+with volume_col2:
+    min_relative_volume = st.number_input(
+        "Minimum relative volume",
+        min_value=1.0,
+        max_value=5.0,
+        value=1.5,
+        step=0.1,
+        disabled=not volume_confirmation,
+        help="Cross-day or cross-week volume as a multiple of the 50-day average volume before the cross"
+    )
+
 if analyze_button:
 
+    # A new scan replaces the results kept from the previous one
+    st.session_state.pop('cross_scan', None)
     st.subheader("Results")
 
     with st.spinner(f"Fetching {selected_index} constituents..."):
@@ -61,31 +140,283 @@ if analyze_button:
     else:
         st.success(f"Found {len(symbols)} stocks in {selected_index}")
         
-        with st.spinner("Analyzing stocks for golden and death crosses..."):
-            analyzer = CrossAnalyzer()
-            results = analyzer.analyze_stocks(symbols, lookback_days=lookback_days, max_symbols=10000)
+        if scan_mode == 'Indicator Signals':
+            
+            with st.spinner("Scanning indicators..."):
+                analyzer = CrossAnalyzer()
+                signal_results = analyzer.scan_indicators(
+                    symbols,
+                    [SCANNERS[name] for name in (selected_scanners or SCANNERS.keys())]
+                )
+            
+            if signal_results.empty:
+                st.warning("No indicator signals found for this index.")
+            else:
+                st.success(f"Found {len(signal_results)} signals across {signal_results['Symbol'].nunique()} stocks!")
+                
+                for scanner_name, scanner_results in signal_results.groupby('Scanner', sort=False):
+                    # Only show the indicators this scanner declared
+                    columns = ['Symbol', 'Company', 'Signal', 'Current_Price'] + list(SCANNERS[scanner_name].indicators) + ['Forward_PE', 'PE_Ratio', 'Market_Cap_B']
+                    with st.expander(f"{scanner_name} ({len(scanner_results)})", expanded=True):
+                        st.dataframe(
+                            scanner_results[columns],
+                            column_config={
+                                "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                                "Company": st.column_config.TextColumn("Company", width="medium"),
+                                "Signal": st.column_config.TextColumn("Signal", width="medium"),
+                                "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                                "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                                "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                                "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+                            },
+                            hide_index=True,
+                            use_container_width=True
+                        )
+                
+                st.download_button(
+                    label="📥 Download Results (CSV)",
+                    data=signal_results.to_csv(index=False),
+                    file_name=f"{selected_index.replace(' ', '_')}_indicator_signals_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+        
+        elif scan_mode == 'Converging':
+            
+            with st.spinner("Ranking stocks by moving-average convergence..."):
+                analyzer = CrossAnalyzer()
+                converging_results = analyzer.find_converging(symbols, lookback_days=lookback_days)
+            
+            if converging_results.empty:
+                st.warning("No stocks are projected to cross in the next 30 trading days.")
+            else:
+                st.success(f"Found {len(converging_results)} stocks projected to cross within 30 trading days!")
+                st.caption("Days to cross is a linear projection of the past 10 days' change in the MA50−MA200 spread.")
+                
+                st.dataframe(
+                    converging_results,
+                    column_config={
+                        "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                        "Company": st.column_config.TextColumn("Company", width="medium"),
+                        "Expected_Cross": st.column_config.TextColumn("Expected Signal", width="small"),
+                        "Days_To_Cross": st.column_config.NumberColumn("Days to Cross", format="%.1f", width="small"),
+                        "Spread_Pct": st.column_config.NumberColumn("Spread (%)", format="%.2f", width="small"),
+                        "Slope_Pct": st.column_config.NumberColumn("Spread Change/Day (%)", format="%.3f", width="small"),
+                        "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                        "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
+                        "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
+                        "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                        "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                        "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+                    },
+                    hide_index=True,
+                    height = (len(converging_results) + 1) * 35,
+                    use_container_width=True
+                )
+                
+                st.download_button(
+                    label="📥 Download Results (CSV)",
+                    data=converging_results.to_csv(index=False),
+                    file_name=f"{selected_index.replace(' ', '_')}_converging_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+        
+        elif timeframe != 'Daily' or len(selected_pairs) != 1 or selected_pairs[0] != 'SMA 50/200':
+            
+            with st.spinner("Analyzing stocks for moving-average crosses..."):
+                analyzer = CrossAnalyzer()
+                if timeframe != 'Daily':
+                    pair_results = analyzer.analyze_timeframe(
+                        symbols,
+                        timeframe,
+                        [MA_PAIR_OPTIONS[label] for label in selected_pairs]
+                    )
+                else:
+                    pair_results = analyzer.analyze_pairs(
+                        symbols,
+                        [MA_PAIR_OPTIONS[label] for label in selected_pairs],
+                        lookback_days=lookback_days
+                    )
+            
+            if pair_results.empty:
+                period = "month" if timeframe == "Monthly" else "week"
+                st.warning(f"No moving-average crosses found in the past {period} for this index.")
+            else:
+                st.success(f"Found {len(pair_results)} crosses across {pair_results['Symbol'].nunique()} stocks!")
+                
+                st.dataframe(
+                    pair_results,
+                    column_config={
+                        "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                        "Pair": st.column_config.TextColumn("MA Pair", width="small"),
+                        "Company": st.column_config.TextColumn("Company", width="medium"),
+                        "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                        "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
+                        "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                        "MA_Short": st.column_config.NumberColumn("Short MA", format="$%.2f", width="small"),
+                        "MA_Long": st.column_config.NumberColumn("Long MA", format="$%.2f", width="small"),
+                        "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                        "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                        "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+                    },
+                    hide_index=True,
+                    height = (len(pair_results) + 1) * 35,
+                    use_container_width=True
+                )
+                
+                st.download_button(
+                    label="📥 Download Results (CSV)",
+                    data=pair_results.to_csv(index=False),
+                    file_name=f"{selected_index.replace(' ', '_')}_ma_pair_crosses_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
         
-        if results.empty:
-            st.warning("No golden or death crosses found in the past week for this index.")
         else:
-            st.success(f"Found {len(results)} stocks with recent crosses!")
             
-            golden_crosses = results[results['Cross_Type'] == 'Golden Cross']
-            death_crosses = results[results['Cross_Type'] == 'Death Cross']
+            analyzer = CrossAnalyzer()
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            live_count = st.empty()
+            live_table = st.empty()
             
-            metric_col1, metric_col2 = st.columns(2)
-            with metric_col1:
-                st.metric("Golden Crosses", len(golden_crosses), delta="Bullish", delta_color="normal")
-            with metric_col2:
-                st.metric("Death Crosses", len(death_crosses), delta="Bearish", delta_color="inverse")
+            # Show crosses as each chunk is analyzed instead of waiting for the whole index
+            found = []
+            for row in analyzer.iter_crosses(
+                symbols,
+                lookback_days=lookback_days,
+                rsi_range=rsi_range if rsi_range != (0, 100) else None,
+                progress_bar=progress_bar,
+                status_text=status_text,
+                min_relative_volume=min_relative_volume if volume_confirmation else None,
+                index_name=selected_index
+            ):
+                found.append(row)
+                live_count.info(f"Found {len(found)} stocks with recent crosses so far...")
+                live_table.dataframe(
+                    pd.DataFrame(found).sort_values('Cross_Date', ascending=False),
+                    column_config={
+                        "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                        "Company": st.column_config.TextColumn("Company", width="medium"),
+                        "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                        "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
+                        "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                        "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
+                        "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
+                        "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
+                        "Rel_Volume_Day": st.column_config.NumberColumn("Rel Vol (Day)", format="%.2fx", width="small"),
+                        "Rel_Volume_Week": st.column_config.NumberColumn("Rel Vol (Week)", format="%.2fx", width="small"),
+                        "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                        "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                        "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
+            
+            for placeholder in (progress_bar, status_text, live_count, live_table):
+                placeholder.empty()
             
-            st.divider()
+            results = pd.DataFrame(found)
+            if not results.empty:
+                results = results.sort_values('Cross_Date', ascending=False)
             
-            tab1, tab2, tab3 = st.tabs(["📊 All Crosses", "📈 Golden Crosses", "📉 Death Crosses"])
+            changes, previous_as_of = analyzer.scan_changes(
+                selected_index,
+                lookback_days=lookback_days,
+                rsi_range=rsi_range if rsi_range != (0, 100) else None,
+                min_relative_volume=min_relative_volume if volume_confirmation else None
+            )
             
-            with tab1:
+            # Kept across reruns so the status filter below can change without rescanning
+            st.session_state['cross_scan'] = {
+                'index': selected_index,
+                'results': results,
+                'changes': changes,
+                'previous_as_of': previous_as_of
+            }
+
+cross_scan = st.session_state.get('cross_scan')
+if cross_scan is not None and cross_scan['index'] == selected_index:
+    results = cross_scan['results']
+    changes = cross_scan['changes']
+    previous_as_of = cross_scan['previous_as_of']
+    
+    if not analyze_button:
+        st.subheader("Results")
+    
+    if results.empty:
+        st.warning("No golden or death crosses found in the past week for this index.")
+    else:
+        st.success(f"Found {len(results)} stocks with recent crosses!")
+        
+        golden_crosses = results[results['Cross_Type'] == 'Golden Cross']
+        death_crosses = results[results['Cross_Type'] == 'Death Cross']
+        
+        metric_col1, metric_col2 = st.columns(2)
+        with metric_col1:
+            st.metric("Golden Crosses", len(golden_crosses), delta="Bullish", delta_color="normal")
+        with metric_col2:
+            st.metric("Death Crosses", len(death_crosses), delta="Bearish", delta_color="inverse")
+        
+        st.divider()
+        
+        tab1, tab2, tab3 = st.tabs(["📊 All Crosses", "📈 Golden Crosses", "📉 Death Crosses"])
+        
+        with tab1:
+            st.dataframe(
+                results,
+                column_config={
+                    "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                    "Company": st.column_config.TextColumn("Company", width="medium"),
+                    "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                    "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
+                    "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                    "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
+                    "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
+                    "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
+                    "Rel_Volume_Day": st.column_config.NumberColumn("Rel Vol (Day)", format="%.2fx", width="small"),
+                    "Rel_Volume_Week": st.column_config.NumberColumn("Rel Vol (Week)", format="%.2fx", width="small"),
+                    "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                    "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                    "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+                },
+                hide_index=True,
+                height = (len(results) + 1) * 35,
+                use_container_width=True
+            )
+        
+        with tab2:
+            if not golden_crosses.empty:
+                st.dataframe(
+                    golden_crosses,
+                    column_config={
+                        "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                        "Company": st.column_config.TextColumn("Company", width="medium"),
+                        "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                        "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
+                        "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                        "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
+                        "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
+                        "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
+                        "Rel_Volume_Day": st.column_config.NumberColumn("Rel Vol (Day)", format="%.2fx", width="small"),
+                        "Rel_Volume_Week": st.column_config.NumberColumn("Rel Vol (Week)", format="%.2fx", width="small"),
+                        "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                        "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                        "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+                    },
+                    hide_index=True,
+                    height = (len(results) + 1) * 35,
+                    use_container_width=True
+                )
+            else:
+                st.info("No golden crosses found in the past week.")
+        
+        with tab3:
+            if not death_crosses.empty:
                 st.dataframe(
-                    results,
+                    death_crosses,
                     column_config={
                         "Symbol": st.column_config.TextColumn("Ticker", width="small"),
                         "Company": st.column_config.TextColumn("Company", width="medium"),
@@ -95,6 +426,8 @@ if analyze_button:
                         "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
                         "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
                         "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
+                        "Rel_Volume_Day": st.column_config.NumberColumn("Rel Vol (Day)", format="%.2fx", width="small"),
+                        "Rel_Volume_Week": st.column_config.NumberColumn("Rel Vol (Week)", format="%.2fx", width="small"),
                         "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
                         "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
                         "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
@@ -103,61 +436,279 @@ if analyze_button:
                     height = (len(results) + 1) * 35,
                     use_container_width=True
                 )
+            else:
+                st.info("No death crosses found in the past week.")
+        
+        st.divider()
+        
+        st.download_button(
+            label="📥 Download Results (CSV)",
+            data=results.to_csv(index=False),
+            file_name=f"{selected_index.replace(' ', '_')}_crosses_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+    
+    st.divider()
+    st.subheader("Changes Since Previous Scan")
+    
+    if previous_as_of is None:
+        st.info("This is the first stored scan of this index with these settings. Tomorrow's scan will show which signals are new, persisting or expired.")
+    elif changes.empty:
+        st.info(f"No signals today or in the previous scan ({previous_as_of}).")
+    else:
+        st.caption(f"Compared with the scan of {previous_as_of}")
+        
+        change_col1, change_col2, change_col3 = st.columns(3)
+        with change_col1:
+            st.metric("New", int((changes['Status'] == 'New').sum()))
+        with change_col2:
+            st.metric("Persisting", int((changes['Status'] == 'Persisting').sum()))
+        with change_col3:
+            st.metric("Expired", int((changes['Status'] == 'Expired').sum()))
+        
+        selected_statuses = st.multiselect(
+            "Show",
+            options=['New', 'Persisting', 'Expired'],
+            default=['New', 'Expired'],
+            help="Expired signals were in the previous scan but are no longer within the past week or no longer pass the filters"
+        )
+        
+        st.dataframe(
+            changes[changes['Status'].isin(selected_statuses)],
+            column_config={
+                "Status": st.column_config.TextColumn("Status", width="small"),
+                "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                "Company": st.column_config.TextColumn("Company", width="medium"),
+                "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
+                "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
+                "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
+                "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
+                "Rel_Volume_Day": st.column_config.NumberColumn("Rel Vol (Day)", format="%.2fx", width="small"),
+                "Rel_Volume_Week": st.column_config.NumberColumn("Rel Vol (Week)", format="%.2fx", width="small"),
+                "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
+                "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+st.divider()
+
+st.subheader("Screener")
+st.markdown("Filter the selected index with an expression over the latest stored indicators and fundamentals, e.g. `golden_cross AND rsi < 60 AND forward_pe < 20`. The snapshot is built once a day; screens run on it without downloading anything.")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_screener_snapshot(index_name):
+    symbols = IndexDataFetcher().get_index_constituents(index_name)
+    if not symbols:
+        return None
+    return ScreenerSnapshot(index_name).load(symbols)
+
+
+screener_col1, screener_col2 = st.columns([4, 1])
+
+with screener_col1:
+    screener_expression = st.text_input(
+        "Screen",
+        value="golden_cross AND rsi < 60 AND forward_pe < 20",
+        help="Combine comparisons with AND, OR, NOT and parentheses. Numbers can be combined with + - * /, "
+             "and text fields compared with quotes, e.g. sector = \"Energy\""
+    )
+
+with screener_col2:
+    st.markdown("<div style='margin-top: 26px;'></div>", unsafe_allow_html=True)
+    screener_button = st.button("🧮 Run Screen", use_container_width=True)
+
+if screener_button:
+    
+    with st.spinner(f"Loading {selected_index} snapshot..."):
+        snapshot = load_screener_snapshot(selected_index)
+    
+    if snapshot is None:
+        st.error(f"Could not fetch constituents for {selected_index}. Please try another index.")
+    else:
+        try:
+            matches = screen(snapshot, screener_expression)
+        except ScreenerError as e:
+            st.error(f"Invalid screen: {e}")
+            matches = None
+        
+        if matches is not None:
+            st.success(f"{len(matches)} of {len(snapshot)} stocks in {selected_index} match")
             
-            with tab2:
-                if not golden_crosses.empty:
-                    st.dataframe(
-                        golden_crosses,
-                        column_config={
-                            "Symbol": st.column_config.TextColumn("Ticker", width="small"),
-                            "Company": st.column_config.TextColumn("Company", width="medium"),
-                            "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
-                            "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
-                            "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
-                            "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
-                            "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
-                            "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
-                            "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
-                            "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
-                            "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
-                        },
-                        hide_index=True,
-                        height = (len(results) + 1) * 35,
-                        use_container_width=True
-                    )
-                else:
-                    st.info("No golden crosses found in the past week.")
-            
-            with tab3:
-                if not death_crosses.empty:
-                    st.dataframe(
-                        death_crosses,
-                        column_config={
-                            "Symbol": st.column_config.TextColumn("Ticker", width="small"),
-                            "Company": st.column_config.TextColumn("Company", width="medium"),
-                            "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
-                            "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
-                            "Current_Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
-                            "MA50": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
-                            "MA200": st.column_config.NumberColumn("MA200", format="$%.2f", width="small"),
-                            "RSI": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
-                            "Forward_PE": st.column_config.NumberColumn("Fwd P/E", format="%.1f", width="small"),
-                            "PE_Ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
-                            "Market_Cap_B": st.column_config.NumberColumn("Mkt Cap ($B)", format="%.1f", width="small")
-                        },
-                        hide_index=True,
-                        height = (len(results) + 1) * 35,
-                        use_container_width=True
-                    )
-                else:
-                    st.info("No death crosses found in the past week.")
+            if not matches.empty:
+                matches = matches.reset_index()
+                leading = ['symbol', 'company', 'sector', 'close']
+                matches = matches[leading + [c for c in matches.columns if c not in leading]]
+                st.dataframe(
+                    matches,
+                    column_config={
+                        "symbol": st.column_config.TextColumn("Ticker", width="small"),
+                        "company": st.column_config.TextColumn("Company", width="medium"),
+                        "close": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                        "rsi_14": st.column_config.NumberColumn("RSI", format="%.1f", width="small"),
+                        "forward_pe": st.column_config.NumberColumn("Forward P/E", format="%.1f", width="small"),
+                        "pe_ratio": st.column_config.NumberColumn("P/E", format="%.1f", width="small"),
+                        "market_cap_b": st.column_config.NumberColumn("Market Cap", format="$%.1fB", width="small")
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
+                
+                st.download_button(
+                    label="📥 Download Screen (CSV)",
+                    data=matches.to_csv(index=False),
+                    file_name=f"{selected_index.replace(' ', '_')}_screen_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+        
+        with st.expander("Available fields"):
+            fields = ', '.join(f"`{c}`" for c in snapshot.columns)
+            aliases = ', '.join(f"`{alias}` → `{name}`" for alias, name in ALIASES.items())
+            st.markdown(f"{fields}\n\nShorthands: {aliases}")
+
+st.divider()
+
+st.subheader("Cross History")
+st.markdown("Search every 50/200-day cross since 2000 for the selected index. The first search for an index builds its history; later searches only process new prices.")
+
+history_col1, history_col2, history_col3 = st.columns(3)
+
+with history_col1:
+    history_start = st.date_input("From", value=datetime(2020, 3, 1))
+
+with history_col2:
+    history_end = st.date_input("To", value=datetime(2020, 3, 31))
+
+with history_col3:
+    st.markdown("<div style='margin-top: 26px;'></div>", unsafe_allow_html=True)
+    history_button = st.button("📜 Search History", use_container_width=True)
+
+if history_button:
+    
+    with st.spinner(f"Fetching {selected_index} constituents..."):
+        fetcher = IndexDataFetcher()
+        symbols = fetcher.get_index_constituents(selected_index)
+    
+    if not symbols:
+        st.error(f"Could not fetch constituents for {selected_index}. Please try another index.")
+    else:
+        with st.spinner("Updating cross history..."):
+            events = CrossEventIndex()
+            events.update(selected_index, symbols)
+            history = events.query(selected_index, history_start, history_end)
+        
+        if history.empty:
+            st.info(f"No crosses found in {selected_index} between {history_start} and {history_end}.")
+        else:
+            st.dataframe(
+                history,
+                column_config={
+                    "Symbol": st.column_config.TextColumn("Ticker", width="small"),
+                    "Cross_Date": st.column_config.DateColumn("Cross Date", width="small"),
+                    "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                    "Close": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+                    "MA_Short": st.column_config.NumberColumn("MA50", format="$%.2f", width="small"),
+                    "MA_Long": st.column_config.NumberColumn("MA200", format="$%.2f", width="small")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
             
-            st.divider()
+            st.download_button(
+                label="📥 Download History (CSV)",
+                data=history.to_csv(index=False),
+                file_name=f"{selected_index.replace(' ', '_')}_cross_history_{history_start}_{history_end}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+
+st.divider()
+
+st.subheader("Backtest")
+st.markdown("Measure how 50/200-day crosses in the selected index have performed: forward returns 5, 20, 60 and 120 trading days after every historical cross.")
+
+backtest_col1, backtest_col2 = st.columns([2, 1])
+
+with backtest_col1:
+    backtest_years = st.slider(
+        "Backtest Period (years)",
+        min_value=5,
+        max_value=25,
+        value=20,
+        step=5,
+        help="Years of price history to backtest over"
+    )
+
+with backtest_col2:
+    st.markdown("<div style='margin-top: 26px;'></div>", unsafe_allow_html=True)
+    backtest_button = st.button("🧪 Run Backtest", use_container_width=True)
+
+if backtest_button:
+    
+    with st.spinner(f"Fetching {selected_index} constituents..."):
+        fetcher = IndexDataFetcher()
+        symbols = fetcher.get_index_constituents(selected_index)
+    
+    if not symbols:
+        st.error(f"Could not fetch constituents for {selected_index}. Please try another index.")
+    else:
+        with st.spinner("Backtesting historical crosses..."):
+            analyzer = CrossAnalyzer()
+            events, summary = analyzer.backtest(symbols, years=backtest_years)
+        
+        if summary.empty:
+            st.warning("No historical crosses found for this index.")
+        else:
+            st.caption("A golden cross is a hit when the price is higher after the horizon; a death cross when it is lower. Constituents are today's, so delisted names are not included.")
+            
+            st.dataframe(
+                summary,
+                column_config={
+                    "Cross_Type": st.column_config.TextColumn("Signal", width="small"),
+                    "Horizon": st.column_config.TextColumn("Horizon", width="small"),
+                    "Signals": st.column_config.NumberColumn("Signals", width="small"),
+                    "Hit_Rate": st.column_config.NumberColumn("Hit Rate", format="%.2f", width="small"),
+                    "Mean_Return": st.column_config.NumberColumn("Mean", format="%.3f", width="small"),
+                    "Median_Return": st.column_config.NumberColumn("Median", format="%.3f", width="small"),
+                    "Std_Return": st.column_config.NumberColumn("Std Dev", format="%.3f", width="small"),
+                    "P10_Return": st.column_config.NumberColumn("10th Pct", format="%.3f", width="small"),
+                    "P90_Return": st.column_config.NumberColumn("90th Pct", format="%.3f", width="small")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+            
+            fig = go.Figure()
+            return_columns = [c for c in events.columns if c.startswith('Return_')]
+            for cross_type, color in (('Golden Cross', 'green'), ('Death Cross', 'red')):
+                subset = events[events['Cross_Type'] == cross_type]
+                returns = subset[return_columns].melt(var_name='Horizon', value_name='Return').dropna()
+                fig.add_trace(go.Box(
+                    x=returns['Horizon'].str.replace('Return_', ''),
+                    y=returns['Return'] * 100,
+                    name=cross_type,
+                    marker_color=color
+                ))
+            fig.update_layout(
+                title="Forward Return Distribution",
+                yaxis_title="Return (%)",
+                boxmode='group',
+                height=450
+            )
+            st.plotly_chart(fig, use_container_width=True)
             
             st.download_button(
-                label="📥 Download Results (CSV)",
-                data=results.to_csv(index=False),
-                file_name=f"{selected_index.replace(' ', '_')}_crosses_{datetime.now().strftime('%Y%m%d')}.csv",
+                label="📥 Download Backtest Signals (CSV)",
+                data=events.to_csv(index=False),
+                file_name=f"{selected_index.replace(' ', '_')}_cross_backtest_{datetime.now().strftime('%Y%m%d')}.csv",
                 mime="text/csv",
                 use_container_width=True
-            )
\ No newline at end of file
+            )
+
@@ -0,0 +1,168 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
+from utils.index_data import IndexDataFetcher
+from utils.breadth import BreadthEngine, breadth_in_range, ALL_GROUP
+from utils.constituent_registry import get_registry
+
+st.set_page_config(page_title="Market Breadth - Trade Ideas", page_icon="🌊", layout="wide")
+
+# Start warming index constituents in case this page was opened directly
+get_registry().start_background_refresh()
+
+st.title("🌊 Market Breadth")
+st.markdown("Track how broad a market move is: the share of index constituents above their 50-day and 200-day moving averages, and daily golden and death cross counts")
+
+st.divider()
+
+
+# Not st.cache_data: a cache hit would replay the progress bar, and the engine already
+# keeps the matrix on disk, rebuilding it at most once a day
+def load_index_matrix(index_name):
+    """Load the stored close matrix and sectors for an index's constituents"""
+    symbols = IndexDataFetcher().get_index_constituents(index_name)
+    if not symbols:
+        return pd.DataFrame(), {}
+    
+    progress_bar = st.progress(0)
+    matrix = BreadthEngine().load_matrix(index_name, symbols, lambda done, total: progress_bar.progress(done / total))
+    progress_bar.empty()
+    
+    return matrix, load_sectors(index_name, list(matrix.columns))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_sectors(index_name, symbols):
+    """Sector per constituent, cached since the lookups can reach Yahoo Finance"""
+    return BreadthEngine().get_sectors(index_name, symbols)
+
+
+st.subheader("Settings")
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    selected_index = st.selectbox(
+        "Select Index",
+        options=['S&P 500', 'Nasdaq 100', 'Russell 1000', 'FTSE 100', 'Eurostoxx'],
+        help="Choose the market index to analyze"
+    )
+
+# Loaded before the date inputs so they can be limited to the stored history
+with st.spinner(f"Loading {selected_index} prices..."):
+    matrix, sectors = load_index_matrix(selected_index)
+
+if matrix.empty:
+    st.error(f"Could not load prices for {selected_index}. Please try another index.")
+    st.stop()
+
+first_date, last_date = matrix.index[0].date(), matrix.index[-1].date()
+
+with col2:
+    start_date = st.date_input(
+        "From",
+        value=max(first_date, (datetime.now() - timedelta(days=730)).date()),
+        min_value=first_date,
+        max_value=last_date
+    )
+
+with col3:
+    end_date = st.date_input("To", value=last_date, min_value=first_date, max_value=last_date)
+
+series = breadth_in_range(matrix, sectors, start_date, end_date)
+overall = series.get(ALL_GROUP, pd.DataFrame())
+
+if overall.empty:
+    st.warning("No price data in the selected date range.")
+    st.stop()
+
+latest = overall.iloc[-1]
+# Crosses over the 30 calendar days up to the end of the selected range
+last_30_days = overall[overall.index >= overall.index[-1] - pd.Timedelta(days=30)]
+metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+with metric_col1:
+    st.metric("Above MA50", f"{latest['Pct_Above_MA50']:.1f}%")
+with metric_col2:
+    st.metric("Above MA200", f"{latest['Pct_Above_MA200']:.1f}%")
+with metric_col3:
+    st.metric("Golden Crosses (30d)", int(last_30_days['Golden_Crosses'].sum()), help=f"30 days to {overall.index[-1]:%Y-%m-%d}")
+with metric_col4:
+    st.metric("Death Crosses (30d)", int(last_30_days['Death_Crosses'].sum()), help=f"30 days to {overall.index[-1]:%Y-%m-%d}")
+
+st.divider()
+
+fig = go.Figure()
+fig.add_trace(go.Scatter(x=overall.index, y=overall['Pct_Above_MA50'], name="% above MA50", line=dict(color='royalblue')))
+fig.add_trace(go.Scatter(x=overall.index, y=overall['Pct_Above_MA200'], name="% above MA200", line=dict(color='darkorange')))
+fig.update_layout(
+    title=f"{selected_index} Constituents Above Moving Averages",
+    yaxis_title="% of constituents",
+    yaxis_range=[0, 100],
+    hovermode='x unified',
+    height=450
+)
+st.plotly_chart(fig, use_container_width=True)
+
+fig = go.Figure()
+fig.add_trace(go.Bar(x=overall.index, y=overall['Golden_Crosses'], name="Golden Crosses", marker_color='green'))
+fig.add_trace(go.Bar(x=overall.index, y=-overall['Death_Crosses'], name="Death Crosses", marker_color='red'))
+fig.update_layout(
+    title="Daily Golden and Death Crosses",
+    yaxis_title="Crosses (death crosses below zero)",
+    barmode='relative',
+    hovermode='x unified',
+    height=350
+)
+st.plotly_chart(fig, use_container_width=True)
+
+sector_names = [name for name in series if name != ALL_GROUP]
+if sector_names:
+    st.subheader("Sector Breadth")
+    
+    sector_summary = pd.DataFrame([
+        {
+            'Sector': name,
+            'Members': int(series[name]['Members'].iloc[-1]),
+            'Pct_Above_MA50': series[name]['Pct_Above_MA50'].iloc[-1],
+            'Pct_Above_MA200': series[name]['Pct_Above_MA200'].iloc[-1],
+            'Golden_Crosses': int(series[name]['Golden_Crosses'].sum()),
+            'Death_Crosses': int(series[name]['Death_Crosses'].sum())
+        }
+        for name in sector_names
+    ]).sort_values('Pct_Above_MA200', ascending=False)
+    
+    st.dataframe(
+        sector_summary,
+        column_config={
+            "Sector": st.column_config.TextColumn("Sector", width="medium"),
+            "Members": st.column_config.NumberColumn("Stocks", width="small"),
+            "Pct_Above_MA50": st.column_config.NumberColumn("% > MA50", format="%.1f", width="small"),
+            "Pct_Above_MA200": st.column_config.NumberColumn("% > MA200", format="%.1f", width="small"),
+            "Golden_Crosses": st.column_config.NumberColumn("Golden Crosses", width="small"),
+            "Death_Crosses": st.column_config.NumberColumn("Death Crosses", width="small")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    selected_sectors = st.multiselect(
+        "Sectors to chart",
+        options=sector_names,
+        default=sector_names[:5],
+        help="Share of each sector's constituents above their 200-day moving average"
+    )
+    
+    if selected_sectors:
+        fig = go.Figure()
+        for name in selected_sectors:
+            fig.add_trace(go.Scatter(x=series[name].index, y=series[name]['Pct_Above_MA200'], name=name))
+        fig.update_layout(
+            title="Sector Constituents Above MA200",
+            yaxis_title="% of constituents",
+            yaxis_range=[0, 100],
+            hovermode='x unified',
+            height=450
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+st.caption("Constituents are today's, so breadth further back excludes companies that have since left the index.")
@@ -17,13 +17,13 @@ def load_russell_analysis():
         analyzer = Russell1000Analyzer()
         # Get S&P 500 candidates from Russell 1000 (filtered automatically)
         candidates = analyzer.get_sp500_candidates(max_companies=1000)
-        return candidates
+        return candidates, pd.DataFrame(analyzer.funnel_report)
     except Exception as e:
         st.error(f"Error analyzing Russell 1000 candidates: {str(e)}")
-        return pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame()
 
 with st.spinner("Analyzing Russell 1000 companies for S&P 500 promotion likelihood..."):
-    candidates_df = load_russell_analysis()
+    candidates_df, funnel_df = load_russell_analysis()
 
 if not candidates_df.empty:
     st.subheader("🏆 Top Candidates for S&P 500 Inclusion")
@@ -129,6 +129,10 @@ if not candidates_df.empty:
 else:
     st.warning("Unable to load S&P 400 analysis data. Please try again later.")
 
+if not funnel_df.empty:
+    with st.expander("⏱️ Screening Funnel"):
+        st.dataframe(funnel_df, width='stretch', hide_index=True)
+
 # Additional information
 with st.expander("ℹ️ About this Analysis"):
     st.markdown("""
@@ -140,6 +144,7 @@ with st.expander("ℹ️ About this Analysis"):
 
     **Methodology:**
     - Russell 1000 companies already in S&P 500 are filtered out automatically
+    - Companies below the $22.7B market cap floor are screened out before detailed analysis
     - Inclusion scores consider market cap, profitability, growth, financial health, and liquidity
     - Scores range from 0-100, with 70+ indicating strong inclusion likelihood
 
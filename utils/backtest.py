@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from utils.cross_engine import prepare_closes, rolling_mean, cross_signals
+
+HORIZONS = (5, 20, 60, 120)
+
+
+def cross_forward_returns(closes, short_window=50, long_window=200, horizons=HORIZONS):
+    """
+    Forward returns after every golden and death cross in a close matrix
+    
+    Crosses and returns are read off the dates × symbols array with fancy
+    indexing, so the whole universe is backtested without a per-symbol loop.
+    
+    Args:
+        closes: DataFrame of closes, indexed by date with one column per symbol
+        short_window: Short moving-average window (default 50)
+        long_window: Long moving-average window (default 200)
+        horizons: Trading-day horizons to measure returns over
+    
+    Returns:
+        DataFrame with one row per cross: Symbol, Cross_Date, Cross_Type, Close
+        and a Return_{h}d column per horizon (NaN where the horizon runs past the data)
+    """
+    columns = ['Symbol', 'Cross_Date', 'Cross_Type', 'Close'] + [f"Return_{h}d" for h in horizons]
+    if closes.empty:
+        return pd.DataFrame(columns=columns)
+    
+    closes = prepare_closes(closes)
+    values = closes.to_numpy()
+    _, cross = cross_signals(rolling_mean(values, short_window), rolling_mean(values, long_window))
+    
+    rows, cols = np.nonzero(cross)
+    entry = values[rows, cols]
+    
+    events = pd.DataFrame({
+        'Symbol': closes.columns[cols],
+        'Cross_Date': closes.index[rows],
+        'Cross_Type': np.where(cross[rows, cols] > 0, 'Golden Cross', 'Death Cross'),
+        'Close': entry,
+    })
+    
+    for h in horizons:
+        exit_rows = rows + h
+        in_range = exit_rows < len(values)
+        exit_price = np.full(len(rows), np.nan)
+        exit_price[in_range] = values[exit_rows[in_range], cols[in_range]]
+        events[f"Return_{h}d"] = exit_price / entry - 1
+    
+    return events[columns].sort_values('Cross_Date', ascending=False, ignore_index=True)
+
+
+def summarize_returns(events, horizons=HORIZONS):
+    """
+    Hit rates and return distribution per cross type and horizon
+    
+    A golden cross is a hit when the forward return is positive, a death
+    cross when it is negative.
+    
+    Returns:
+        DataFrame with Cross_Type, Horizon, Signals, Hit_Rate, Mean_Return,
+        Median_Return, Std_Return and the 10th/90th return percentiles
+    """
+    rows = []
+    for cross_type, direction in (('Golden Cross', 1), ('Death Cross', -1)):
+        subset = events[events['Cross_Type'] == cross_type]
+        for h in horizons:
+            returns = subset[f"Return_{h}d"].dropna().to_numpy()
+            if len(returns) == 0:
+                continue
+            rows.append({
+                'Cross_Type': cross_type,
+                'Horizon': f"{h}d",
+                'Signals': len(returns),
+                'Hit_Rate': float(np.mean(returns * direction > 0)),
+                'Mean_Return': float(np.mean(returns)),
+                'Median_Return': float(np.median(returns)),
+                'Std_Return': float(np.std(returns)),
+                'P10_Return': float(np.percentile(returns, 10)),
+                'P90_Return': float(np.percentile(returns, 90)),
+            })
+    
+    return pd.DataFrame(rows)
@@ -0,0 +1,172 @@
+import os
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_paths import cache_path, atomic_write
+from utils.constituent_registry import get_registry
+from utils.cross_engine import prepare_closes, cumulative_sums, window_mean, cross_signals
+from utils.fetch_executor import FetchExecutor
+from utils.fundamentals_cache import FundamentalsCache
+from utils.price_store import PriceStore
+from utils.symbols import to_yahoo_symbol
+
+ALL_GROUP = 'All'
+
+
+def breadth_series(closes, groups=None, short_window=50, long_window=200):
+    """
+    Market breadth over time for a universe and its groups, in one array pass
+    
+    Per-symbol flags (above each moving average, golden/death cross today) are
+    computed once for the whole close matrix and summed per group with a
+    single matrix product against a symbol-to-group indicator matrix.
+    
+    Args:
+        closes: DataFrame of closes, indexed by date with one column per symbol
+        groups: Optional dict of symbol -> group (e.g. sector); symbols without one are only in 'All'
+        short_window: Short moving-average window (default 50)
+        long_window: Long moving-average window (default 200)
+    
+    Returns:
+        Dict of group -> DataFrame indexed by date with Pct_Above_MA50,
+        Pct_Above_MA200, Golden_Crosses, Death_Crosses and Members; the whole
+        universe is under 'All'
+    """
+    if closes.empty:
+        return {}
+    groups = groups or {}
+    
+    closes = prepare_closes(closes)
+    values = closes.to_numpy()
+    csum, ccount = cumulative_sums(values)
+    ma_short = window_mean(csum, ccount, short_window)
+    ma_long = window_mean(csum, ccount, long_window)
+    _, cross = cross_signals(ma_short, ma_long)
+    
+    names = [ALL_GROUP] + sorted({groups[s] for s in closes.columns if groups.get(s)})
+    indicator = np.zeros((len(closes.columns), len(names)))
+    indicator[:, 0] = 1
+    for i, symbol in enumerate(closes.columns):
+        if groups.get(symbol):
+            indicator[i, names.index(groups[symbol])] = 1
+    
+    def per_group(flags):
+        return flags.astype(float) @ indicator
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        above_short = per_group(values > ma_short) / per_group(~np.isnan(ma_short)) * 100
+        above_long = per_group(values > ma_long) / per_group(~np.isnan(ma_long)) * 100
+    golden = per_group(cross == 2)
+    death = per_group(cross == -2)
+    members = per_group(~np.isnan(values))
+    
+    series = {}
+    for j, name in enumerate(names):
+        series[name] = pd.DataFrame({
+            f"Pct_Above_MA{short_window}": above_short[:, j],
+            f"Pct_Above_MA{long_window}": above_long[:, j],
+            'Golden_Crosses': golden[:, j].astype(int),
+            'Death_Crosses': death[:, j].astype(int),
+            'Members': members[:, j].astype(int),
+        }, index=closes.index)
+    
+    return series
+
+
+def breadth_in_range(closes, groups=None, start_date=None, end_date=None):
+    """
+    Breadth series trimmed to a date range
+    
+    Moving averages are computed over the full matrix first, so the range
+    start does not lose the warm-up window.
+    """
+    series = breadth_series(closes, groups)
+    start_date = pd.Timestamp(start_date) if start_date is not None else None
+    end_date = pd.Timestamp(end_date) if end_date is not None else None
+    return {name: frame.loc[start_date:end_date] for name, frame in series.items()}
+
+
+class BreadthEngine:
+    """
+    Breadth series per index from a stored universe close matrix.
+    
+    Each index keeps one Parquet file with the closes of all its constituents,
+    rebuilt from the price store at most once a day. Charting any date range
+    is then a file read and one call to breadth_series.
+    """
+    
+    def __init__(self, history_years=10, chunk_size=100):
+        self.history_years = history_years
+        self.chunk_size = chunk_size
+        self.store = PriceStore()
+        self.fundamentals = FundamentalsCache()
+        self.executor = FetchExecutor()
+        self.registry = get_registry()
+    
+    def _matrix_path(self, index_name):
+        return cache_path('universe', f"{index_name.replace(' ', '_').replace('&', 'and')}.parquet")
+    
+    def load_matrix(self, index_name, symbols, progress_callback=None):
+        """
+        Close matrix for an index's constituents
+        
+        Args:
+            index_name: Index the symbols belong to
+            symbols: Constituent symbols
+            progress_callback: Optional callable(done, total) while rebuilding
+        
+        Returns:
+            DataFrame of closes, indexed by date with one column per symbol that has data
+        """
+        path = self._matrix_path(index_name)
+        if os.path.exists(path) and datetime.fromtimestamp(os.path.getmtime(path)).date() == datetime.now().date():
+            try:
+                cached = pd.read_parquet(path)
+                if set(symbols) <= set(cached.columns) | self.store.negative_cache.known_bad(symbols):
+                    return cached[[s for s in symbols if s in cached.columns]]
+            except Exception as e:
+                logging.warning(f"Could not read stored close matrix for {index_name}: {e}")
+        
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(self.history_years * 365.25))
+        
+        closes = {}
+        for chunk_start in range(0, len(symbols), self.chunk_size):
+            chunk = list(symbols[chunk_start:chunk_start + self.chunk_size])
+            try:
+                bars = self.store.get_many(chunk, start_date, end_date)
+            except Exception as e:
+                logging.warning(f"Could not load prices for breadth starting at {chunk[0]}: {e}")
+                bars = {}
+            closes.update((symbol, bars[symbol]['Close']) for symbol in chunk if symbol in bars)
+            if progress_callback:
+                progress_callback(chunk_start + len(chunk), len(symbols))
+        
+        matrix = pd.DataFrame(closes).sort_index()
+        try:
+            atomic_write(path, matrix.to_parquet)
+        except Exception as e:
+            logging.warning(f"Could not store close matrix for {index_name}: {e}")
+        
+        return matrix
+    
+    def get_sectors(self, index_name, symbols):
+        """
+        Sector per symbol: GICS sectors from Wikipedia for the S&P 500, cached
+        ticker.info sectors for other indices
+        """
+        if index_name == 'S&P 500':
+            sectors = {
+                to_yahoo_symbol(symbol, 'S&P 500'): data['GICS_Sector']
+                for symbol, data in self.registry.get_sp500_sectors().items()
+            }
+            return {symbol: sectors[symbol] for symbol in symbols if symbol in sectors}
+        
+        sectors = {}
+        for symbol, info in self.fundamentals.iter_info(symbols, ['sector'], self.executor):
+            if info.get('sector'):
+                sectors[symbol] = info['sector']
+        return sectors
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+# Root directory for all on-disk caches (price bars, fundamentals, ...).
+# Override with TRADE_IDEAS_CACHE_DIR to share a cache between deployments.
+CACHE_DIR = os.environ.get('TRADE_IDEAS_CACHE_DIR', os.path.join(os.getcwd(), '.cache'))
+
+
+def cache_path(*parts):
+    """Return a path inside the cache directory, creating parent folders as needed"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def atomic_write(path, write):
+    """
+    Replace a file atomically through a private temporary file in the same folder
+    
+    Each call gets its own temporary file, so threads of the same Streamlit
+    process writing the same path cannot truncate or move each other's data.
+    
+    Args:
+        path: File to replace
+        write: Callable taking the temporary path and writing the complete file to it
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
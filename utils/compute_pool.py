@@ -0,0 +1,139 @@
+import os
+import math
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Indicator work is CPU bound, so it scales with processes rather than threads.
+# Set to 1 to keep all computation in the Streamlit process.
+DEFAULT_COMPUTE_WORKERS = int(os.environ.get('TRADE_IDEAS_COMPUTE_WORKERS', os.cpu_count() or 1))
+
+# Below this many symbols per process, start-up and result transfer cost more than they save
+MIN_SYMBOLS_PER_WORKER = int(os.environ.get('TRADE_IDEAS_COMPUTE_MIN_SYMBOLS', 200))
+
+# Streaming scans seed state one download chunk (up to 100 symbols) at a time. A warm
+# worker costs ~15 ms per call against ~40 ms of seeding per 100 symbols, so chunk
+# calls split from 50 symbols per worker; the 25-symbol first chunk stays in-process.
+CHUNK_MIN_SYMBOLS_PER_WORKER = int(os.environ.get('TRADE_IDEAS_COMPUTE_CHUNK_MIN_SYMBOLS', 50))
+
+
+def _run_shard(fn, shm_name, shape, dates, columns, col_start, col_stop, kwargs):
+    """Worker entry point: rebuild one column shard from shared memory and run fn on it"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Column-major layout keeps each shard's columns contiguous
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+        shard = pd.DataFrame(values[:, col_start:col_stop].copy(), index=pd.DatetimeIndex(dates), columns=columns)
+        del values
+    finally:
+        shm.close()
+    
+    return fn(shard, **kwargs)
+
+
+class ComputeBackend:
+    """
+    Process pool for indicator work over a dates × symbols close matrix.
+    
+    The close matrix is copied once into shared memory and each worker maps a
+    contiguous block of symbol columns from it, so only the dates, column
+    names and the compact per-symbol results cross process boundaries. Any
+    module-level function taking a close DataFrame and returning a DataFrame
+    of per-symbol rows (last_crosses, converging, scan_pairs, ...) can be run
+    this way. Small universes run in-process.
+    """
+    
+    def __init__(self, max_workers=None, min_symbols_per_worker=None):
+        self.max_workers = max_workers or DEFAULT_COMPUTE_WORKERS
+        self.min_symbols_per_worker = min_symbols_per_worker or MIN_SYMBOLS_PER_WORKER
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Forking a multi-threaded Streamlit server is unsafe, so workers are spawned
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+    
+    def warm(self):
+        """Start the worker processes in the background so the first pooled call does not wait for them"""
+        if self.max_workers <= 1:
+            return
+        pool = self._get_pool()
+        for _ in range(self.max_workers):
+            pool.submit(os.getpid)
+    
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+    
+    def run(self, fn, closes, min_symbols_per_worker=None, **kwargs):
+        """
+        Run fn over column shards of a close matrix and combine the results
+        
+        Args:
+            fn: Module-level function taking a close DataFrame (plus kwargs) and
+                returning a DataFrame with one or more rows per symbol
+            closes: DataFrame of closes, indexed by date with one column per symbol
+            min_symbols_per_worker: Optional shard size floor for this call
+                (default self.min_symbols_per_worker)
+            **kwargs: Extra keyword arguments passed to fn
+        
+        Returns:
+            Concatenated results of fn over all shards
+        """
+        n_symbols = len(closes.columns)
+        shards = min(self.max_workers, n_symbols // (min_symbols_per_worker or self.min_symbols_per_worker))
+        if shards <= 1:
+            return fn(closes, **kwargs)
+        
+        closes = closes.sort_index()
+        values = closes.to_numpy(dtype=np.float64)
+        
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf, order='F')
+            shared[:] = values
+            del shared
+            
+            dates = closes.index.to_numpy()
+            step = math.ceil(n_symbols / shards)
+            futures = [
+                self._get_pool().submit(
+                    _run_shard, fn, shm.name, values.shape, dates,
+                    list(closes.columns[start:start + step]), start, min(start + step, n_symbols), kwargs
+                )
+                for start in range(0, n_symbols, step)
+            ]
+            results = [future.result() for future in futures]
+        except Exception as e:
+            # A broken pool (e.g. a worker killed by the OS) should not fail the scan
+            logging.warning(f"Process pool computation failed, running in-process: {e}")
+            self.shutdown()
+            return fn(closes, **kwargs)
+        finally:
+            shm.close()
+            shm.unlink()
+        
+        return pd.concat(results)
+
+
+_shared_backend = ComputeBackend()
+atexit.register(_shared_backend.shutdown)
+
+
+def get_compute_backend():
+    """Return the process-wide compute backend, whose worker processes are reused across scans"""
+    return _shared_backend
@@ -0,0 +1,299 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from utils.providers import get_provider
+
+SP500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+
+INDEX_URLS = {
+    'S&P 500': SP500_URL,
+    'Nasdaq 100': "https://en.wikipedia.org/wiki/Nasdaq-100",
+    'Russell 1000': "https://en.wikipedia.org/wiki/Russell_1000_Index",
+    'FTSE 100': "https://en.wikipedia.org/wiki/FTSE_100_Index",
+    'Eurostoxx': "https://en.wikipedia.org/wiki/EURO_STOXX_50",
+}
+
+
+class ConstituentRegistry:
+    """
+    Process-wide cache of index constituent pages.
+    
+    Each page is downloaded and parsed at most once per TTL, however many
+    pages or sessions ask for it. The S&P 500 page is parsed in a single pass
+    into its constituents table and its historical changes table.
+    
+    With the background refresher running, all index pages are fetched
+    concurrently at start-up and again on every refresh interval, and readers
+    are served the cached copy without waiting on the network.
+    """
+    
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        self._pages = {}  # url -> (fetched_at, soup)
+        self._sp500 = None  # (fetched_at, parsed data)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._refresher = None
+    
+    def _lock_for(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def _is_fresh(self, entry):
+        return entry is not None and time.time() - entry[0] < self.ttl
+    
+    def _is_usable(self, entry):
+        # While the refresher runs, an expired copy is served until it is replaced
+        return self._is_fresh(entry) or (entry is not None and self.is_refreshing())
+    
+    def get_page(self, url):
+        """
+        Get the parsed HTML of a page, downloading it only if the cached copy has expired
+        
+        Raises:
+            requests.RequestException (or LookupError when replaying) if the page cannot be downloaded
+        """
+        entry = self._pages.get(url)
+        if self._is_usable(entry):
+            return entry[1]
+        
+        # Only one thread downloads a given page; the others wait for its result
+        with self._lock_for(url):
+            entry = self._pages.get(url)
+            if self._is_usable(entry):
+                return entry[1]
+            
+            soup = self._download_page(url)
+            self._pages[url] = (time.time(), soup)
+            return soup
+    
+    def _download_page(self, url):
+        content = get_provider().get_html(url, self.headers)
+        return BeautifulSoup(content, 'html.parser')
+    
+    def get_sp500(self):
+        """
+        Get the parsed S&P 500 page
+        
+        Returns:
+            Dict with 'symbols' (list), 'sectors' (symbol -> {'Company', 'GICS_Sector'})
+            and 'changes' (list of change records)
+        """
+        if self._is_usable(self._sp500):
+            return self._sp500[1]
+        
+        with self._lock_for('sp500'):
+            if self._is_usable(self._sp500):
+                return self._sp500[1]
+            
+            return self._parse_sp500(self.get_page(SP500_URL))
+    
+    def _parse_sp500(self, soup):
+        tables = soup.find_all('table', class_='wikitable')
+        
+        symbols, sectors = self._parse_constituents_table(tables[0] if tables else None)
+        changes = self._parse_changes_table(tables[1]) if len(tables) >= 2 else []
+        
+        data = {'symbols': symbols, 'sectors': sectors, 'changes': changes}
+        self._sp500 = (time.time(), data)
+        return data
+    
+    async def refresh_all(self, urls=None):
+        """
+        Download and parse all index pages concurrently, replacing the cached copies
+        
+        A page that fails to download keeps its previous cached copy.
+        """
+        urls = list(urls or INDEX_URLS.values())
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._download_page, url) for url in urls),
+            return_exceptions=True
+        )
+        
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Could not refresh {url}: {result}")
+                continue
+            
+            self._pages[url] = (time.time(), result)
+            if url == SP500_URL:
+                await asyncio.to_thread(self._parse_sp500, result)
+    
+    def start_background_refresh(self, interval=None):
+        """
+        Warm every index page now and keep refreshing them on a background thread
+        
+        Safe to call on every script run; only the first call starts the thread.
+        """
+        interval = interval or self.ttl * 0.8
+        
+        with self._locks_lock:
+            if self.is_refreshing():
+                return
+            
+            def run():
+                while True:
+                    try:
+                        asyncio.run(self.refresh_all())
+                    except Exception as e:
+                        logging.warning(f"Index page refresh failed: {e}")
+                    time.sleep(interval)
+            
+            self._refresher = threading.Thread(target=run, name='index-page-refresh', daemon=True)
+            self._refresher.start()
+    
+    def is_refreshing(self):
+        """Whether the background refresher thread is running"""
+        return self._refresher is not None and self._refresher.is_alive()
+    
+    def get_sp500_symbols(self):
+        """Get current S&P 500 symbols"""
+        return list(self.get_sp500()['symbols'])
+    
+    def get_sp500_sectors(self):
+        """Get company name and GICS sector for each current S&P 500 symbol"""
+        return dict(self.get_sp500()['sectors'])
+    
+    def get_sp500_changes(self):
+        """Get the S&P 500 historical changes log"""
+        return [dict(change) for change in self.get_sp500()['changes']]
+    
+    def _parse_constituents_table(self, table):
+        """Parse symbols, company names and sectors from the main S&P 500 table"""
+        symbols = []
+        sectors = {}
+        
+        if not table:
+            return symbols, sectors
+        
+        rows = table.find_all('tr')[1:]  # Skip header row
+        
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 1:
+                try:
+                    symbol = re.sub(r'\[.*?\]', '', cells[0].get_text()).strip()
+                    symbol = re.sub(r'[^\w.-]', '', symbol)
+                    if not symbol:
+                        continue
+                    
+                    symbols.append(symbol)
+                    
+                    if len(cells) >= 3:  # Symbol, Security, GICS Sector
+                        company = re.sub(r'\[.*?\]', '', cells[1].get_text()).strip()
+                        sector = re.sub(r'\[.*?\]', '', cells[2].get_text()).strip()
+                        if sector:
+                            sectors[symbol] = {
+                                'Company': company,
+                                'GICS_Sector': sector
+                            }
+                except Exception as e:
+                    continue  # Skip problematic rows
+        
+        return symbols, sectors
+    
+    def _parse_changes_table(self, table):
+        """Parse the changes table from Wikipedia"""
+        changes = []
+        rows = table.find_all('tr')[2:]  # Skip header rows (first two rows)
+        
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 4:  # Ensure we have enough columns
+                try:
+                    # Extract data from cells based on Wikipedia structure
+                    date_text = cells[0].get_text().strip()
+                    
+                    # Parse date
+                    date = self._parse_date(date_text)
+                    if not date:
+                        continue
+                    
+                    # Get reason (last column)
+                    reason_text = cells[-1].get_text().strip() if len(cells) > 4 else ""
+                    
+                    # Handle added stocks
+                    if len(cells) >= 3:
+                        added_ticker = cells[1].get_text().strip()
+                        added_company = cells[2].get_text().strip() if len(cells) > 2 else ""
+                        
+                        if added_ticker and added_ticker != "—" and added_ticker != "-":
+                            changes.append({
+                                'Date': date,
+                                'Symbol': added_ticker,
+                                'Company': added_company or "Unknown Company",
+                                'Change_Type': 'Added',
+                                'GICS_Sector': "Unknown",  # Filled in from the constituents table later
+                                'Reason': reason_text
+                            })
+                    
+                    # Handle removed stocks
+                    if len(cells) >= 5:
+                        removed_ticker = cells[3].get_text().strip()
+                        removed_company = cells[4].get_text().strip()
+                        
+                        if removed_ticker and removed_ticker != "—" and removed_ticker != "-":
+                            changes.append({
+                                'Date': date,
+                                'Symbol': removed_ticker,
+                                'Company': removed_company or "Unknown Company",
+                                'Change_Type': 'Removed',
+                                'GICS_Sector': "Unknown",  # Filled in from the constituents table later
+                                'Reason': reason_text
+                            })
+                            
+                except Exception as e:
+                    continue  # Skip problematic rows
+        
+        return changes
+    
+    def _parse_date(self, date_text):
+        """Parse date from various formats"""
+        try:
+            # Clean the date text
+            date_text = re.sub(r'\[.*?\]', '', date_text).strip()
+            
+            # Try different date formats
+            date_formats = [
+                '%B %d, %Y',
+                '%b %d, %Y', 
+                '%Y-%m-%d',
+                '%m/%d/%Y',
+                '%d %B %Y',
+                '%d %b %Y'
+            ]
+            
+            for fmt in date_formats:
+                try:
+                    return datetime.strptime(date_text, fmt).date()
+                except ValueError:
+                    continue
+            
+            # Try to extract year and create a date
+            year_match = re.search(r'(\d{4})', date_text)
+            if year_match:
+                year = int(year_match.group(1))
+                # Default to January 1st if we can't parse the full date
+                return datetime(year, 1, 1).date()
+            
+            return None
+            
+        except Exception:
+            return None
+
+
+_registry = ConstituentRegistry()
+
+
+def get_registry():
+    """Return the registry shared by every page and session in this process"""
+    return _registry
@@ -1,19 +1,38 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import streamlit as st
 import logging
+from utils.price_store import PriceStore
+from utils.fetch_executor import FetchExecutor
+from utils.fundamentals_cache import FundamentalsCache
+from utils.ma_state import MovingAverageStateStore
+from utils.rsi_engine import RsiStateStore
+from utils.cross_engine import scan_pairs, converging, relative_volume
+from utils.timeframes import ResampledCloseCache, TIMEFRAME_DAYS, label_open_period
+from utils.indicators import IndicatorFrame, run_scanners
+from utils.scan_checkpoint import ScanCheckpoint
+from utils.scan_history import ScanHistory
+from utils.compute_pool import get_compute_backend, CHUNK_MIN_SYMBOLS_PER_WORKER
+from utils.backtest import HORIZONS, cross_forward_returns, summarize_returns
 
 class CrossAnalyzer:
     """Analyzer for detecting golden and death crosses in stocks"""
     
-    def __init__(self):
+    def __init__(self, chunk_size=100):
         self.short_ma = 50
         self.long_ma = 200
+        self.chunk_size = chunk_size
+        self.store = PriceStore()
+        self.executor = FetchExecutor()
+        self.fundamentals = FundamentalsCache()
+        self.ma_states = MovingAverageStateStore(self.short_ma, self.long_ma)
+        self.rsi_states = RsiStateStore(period=14)
+        self.compute = get_compute_backend()
+        self.history = ScanHistory()
         logging.basicConfig(level=logging.WARNING)
     
-    def analyze_stocks(self, symbols, lookback_days=180, max_symbols=100):
+    def analyze_stocks(self, symbols, lookback_days=180, max_symbols=100, chunk_size=None, rsi_range=None, min_relative_volume=None):
         """
         Analyze stocks for golden and death crosses
         
@@ -21,30 +40,20 @@ class CrossAnalyzer:
             symbols: List of stock symbols to analyze
             lookback_days: Number of days to look back for price data (default 180 = ~6 months)
             max_symbols: Maximum number of symbols to analyze (default 100)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+            rsi_range: Optional (min, max) tuple; only crosses with a 14-day RSI inside it are kept
+            min_relative_volume: Optional volume confirmation; only crosses whose cross-day or
+                cross-week volume is at least this multiple of the trailing 50-day average are kept
         
         Returns:
             DataFrame with stocks that have had recent crosses
         """
-        results = []
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=lookback_days + self.long_ma)
-        
-        total_symbols = len(symbols)
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        for idx, symbol in enumerate(symbols):
-            try:
-                status_text.text(f"Analyzing {symbol}... ({idx + 1}/{total_symbols})")
-                progress_bar.progress((idx + 1) / total_symbols)
-                
-                cross_data = self._check_cross(symbol, start_date, end_date)
-                
-                if cross_data:
-                    results.append(cross_data)
-                    
-            except Exception as e:
-                continue
+        results = list(self.iter_crosses(
+            symbols, lookback_days, chunk_size, rsi_range, progress_bar, status_text, min_relative_volume
+        ))
         
         progress_bar.empty()
         status_text.empty()
@@ -56,102 +65,583 @@ class CrossAnalyzer:
         else:
             return pd.DataFrame()
     
-    def _check_cross(self, symbol, start_date, end_date):
-        """Check if a stock has had a golden or death cross in the past week"""
+    def iter_crosses(self, symbols, lookback_days=180, chunk_size=None, rsi_range=None, progress_bar=None, status_text=None,
+                     min_relative_volume=None, index_name=None):
+        """
+        Yield cross result rows as soon as each download chunk has been analyzed
+        
+        Symbols nearest a cross are downloaded first and the first chunk is
+        small, so the first crossers arrive within seconds on large indices.
+        Results are checkpointed per chunk; a rerun with the same symbols and
+        parameters on the same day replays them and resumes where it stopped.
+        With an index name, the completed scan is kept in the scan history and
+        symbols whose last close is unchanged since their previous scan reuse
+        its result instead of being analyzed again.
+        
+        Args:
+            symbols: List of stock symbols to analyze
+            lookback_days: Number of days to look back for price data (default 180 = ~6 months)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+            rsi_range: Optional (min, max) tuple; only crosses with a 14-day RSI inside it are kept
+            progress_bar: Optional Streamlit progress bar to update
+            status_text: Optional Streamlit placeholder for status messages
+            min_relative_volume: Optional minimum cross-day or cross-week relative volume
+            index_name: Optional index the symbols belong to, for the scan history
+        
+        Yields:
+            Result row dicts, one per stock with a cross in the past week
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=lookback_days + self.long_ma)
+        progress_bar = progress_bar or st.progress(0)
+        status_text = status_text or st.empty()
+        
+        params = self.scan_params(lookback_days, rsi_range, min_relative_volume)
+        checkpoint = ScanCheckpoint('crosses', symbols, params, end_date.date())
+        done = checkpoint.load()
+        remaining = [symbol for symbol in symbols if symbol not in done]
+        if done:
+            status_text.text(f"Resuming scan: {len(done)} of {len(symbols)} symbols already processed")
+        
+        found = [row for row in done.values() if row is not None]
+        yield from found
+        
+        # Spawn workers while the first chunk downloads, but only when enough symbols are
+        # left for a chunk to split across two of them; small rescans stay in-process
+        if len(remaining) >= 2 * CHUNK_MIN_SYMBOLS_PER_WORKER:
+            self.compute.warm()
+        
+        # Indicator state is loaded once per scan and saved once at the end, not per chunk
+        ma_states = self.ma_states.load()
+        rsi_states = self.rsi_states.load()
+        analyzed_symbols = set()
+        
         try:
-            ticker = yf.Ticker(symbol)
-            logging.info(f"yfinance data retrieved for {symbol}")
-            hist = ticker.history(start=start_date, end=end_date, auto_adjust=True)
-            
-            if hist.empty or len(hist) < self.long_ma:
-                logging.warning(f"no history for {symbol}")
-                return None
-            
-            hist['MA50'] = hist['Close'].rolling(window=self.short_ma).mean()
-            hist['MA200'] = hist['Close'].rolling(window=self.long_ma).mean()
-            
-            hist = hist.dropna()
-            
-            if len(hist) < 10:
-                logging.warning(f"history too short for {symbol}")
-                return None
-            
-            hist['Signal'] = np.where(hist['MA50'] > hist['MA200'], 1, -1)
-            hist['Cross'] = hist['Signal'].diff()
-            
             one_week_ago = end_date - timedelta(days=7)
-            hist.index = hist.index.tz_localize(None)
-            recent_data = hist[hist.index >= one_week_ago]
-            
-            if recent_data.empty:
-                logging.warning(f"recent data empty for {symbol}")
-                return None
-            
-            golden_cross = recent_data[recent_data['Cross'] == 2]
-            death_cross = recent_data[recent_data['Cross'] == -2]
-            
-            cross_type = None
-            cross_date = None
-            
-            if not golden_cross.empty:
-                cross_type = 'Golden Cross'
-                cross_date = golden_cross.index[-1]
-            elif not death_cross.empty:
-                cross_type = 'Death Cross'
-                cross_date = death_cross.index[-1]
-            
-            if cross_type:
-                latest_data = hist.iloc[-1]
-                current_price = latest_data['Close']
-                ma50 = latest_data['MA50']
-                ma200 = latest_data['MA200']
+            for chunk, closes, volumes in self._iter_close_chunks(remaining, start_date, end_date, chunk_size, progress_bar, status_text):
+                reused, inputs = {}, {}
+                if index_name is not None and not closes.empty:
+                    last_dates = closes.apply(lambda series: series.last_valid_index())
+                    inputs = {
+                        symbol: (last_dates[symbol], closes.at[last_dates[symbol], symbol])
+                        for symbol in closes.columns if pd.notna(last_dates[symbol])
+                    }
+                    # No new bar since the last scan: only the one-week window can have moved on
+                    reused = {
+                        symbol: row if row is not None and pd.Timestamp(row['Cross_Date']) >= one_week_ago else None
+                        for symbol, row in self.history.unchanged(index_name, params, inputs).items()
+                    }
+                    closes = closes.drop(columns=list(reused))
+                    volumes = volumes.drop(columns=[symbol for symbol in reused if symbol in volumes.columns])
                 
-                rsi = self._calculate_rsi(hist['Close'])
+                results = self._find_crosses(closes, end_date, rsi_range, volumes, min_relative_volume, ma_states, rsi_states)
+                analyzed_symbols.update(closes.columns)
                 
-                try:
-                    info = ticker.info
-                    forward_pe = info.get('forwardPE', None)
-                    pe_ratio = info.get('trailingPE', None)
-                    market_cap = info.get('marketCap', None)
-                    company_name = info.get('longName', symbol)
-                except:
-                    forward_pe = None
-                    pe_ratio = None
-                    market_cap = None
-                    company_name = symbol
+                if results:
+                    status_text.text(f"Fetching valuation data for {len(results)} stocks with crosses...")
+                    self._add_fundamentals(results)
                 
-                return {
-                    'Symbol': symbol,
-                    'Company': company_name,
-                    'Cross_Type': cross_type,
-                    'Cross_Date': cross_date.strftime('%Y-%m-%d'),
-                    'Current_Price': round(current_price, 2),
-                    'MA50': round(ma50, 2),
-                    'MA200': round(ma200, 2),
-                    'RSI': round(rsi, 2) if rsi else None,
-                    'Forward_PE': round(forward_pe, 2) if forward_pe else None,
-                    'PE_Ratio': round(pe_ratio, 2) if pe_ratio else None,
-                    'Market_Cap_B': round(market_cap / 1e9, 2) if market_cap else None
-                }
-
-            return None
-            
-        except Exception as e:
-            logging.warning(f"Exception of type {type(e).__name__} occurred for {symbol}: {e}", exc_info=True)
-            return None
+                if index_name is not None:
+                    analyzed = {row['Symbol']: row for row in results}
+                    self.history.remember_inputs(
+                        index_name, params,
+                        {symbol: inputs[symbol] for symbol in closes.columns if symbol in inputs},
+                        analyzed
+                    )
+                    results += [row for row in reused.values() if row is not None]
+                
+                # Symbols without a cross are recorded too, so a resumed scan skips them
+                processed = dict.fromkeys(chunk)
+                processed.update((row['Symbol'], row) for row in results)
+                checkpoint.record(processed)
+                
+                found += results
+                yield from results
+        finally:
+            # Also runs when the page stops consuming the scan, so processed chunks keep their state
+            self._save_states(ma_states, rsi_states, analyzed_symbols)
+        
+        checkpoint.complete()
+        if index_name is not None:
+            self.history.record(index_name, params, end_date.date(), found)
     
-    def _calculate_rsi(self, prices, period=14):
-        """Calculate RSI indicator"""
-        try:
-            delta = prices.diff()
+    def _save_states(self, ma_states, rsi_states, symbols):
+        """Store the indicator states of the symbols a scan analyzed, keeping other scans' symbols"""
+        for store, states, label in ((self.ma_states, ma_states, 'moving-average'), (self.rsi_states, rsi_states, 'RSI')):
+            try:
+                store.merge({symbol: states[symbol] for symbol in symbols if symbol in states})
+            except Exception as e:
+                logging.warning(f"Could not store {label} state: {e}")
+    
+    def scan_params(self, lookback_days=180, rsi_range=None, min_relative_volume=None):
+        """Parameters identifying a cross scan in its checkpoint and in the scan history"""
+        return {
+            'lookback_days': lookback_days, 'short_ma': self.short_ma, 'long_ma': self.long_ma,
+            'rsi_range': rsi_range, 'min_relative_volume': min_relative_volume
+        }
+    
+    def scan_changes(self, index_name, lookback_days=180, rsi_range=None, min_relative_volume=None):
+        """
+        Signals of today's stored scan compared with the previous stored scan
+        
+        Returns:
+            Tuple of (DataFrame of signals with a New, Persisting or Expired
+            Status, as-of date of the previous scan or None)
+        """
+        params = self.scan_params(lookback_days, rsi_range, min_relative_volume)
+        return self.history.diff(index_name, params, datetime.now().date())
+    
+    def analyze_pairs(self, symbols, pairs, lookback_days=180, chunk_size=None):
+        """
+        Analyze stocks for crosses of several moving-average pairs in one pass
+        
+        Prices are fetched once and every pair is evaluated over the same close
+        matrix, sharing cumulative sums between the simple averages.
+        
+        Args:
+            symbols: List of stock symbols to analyze
+            pairs: List of (short_window, long_window, kind) with kind 'SMA' or 'EMA'
+            lookback_days: Number of days to look back for price data (default 180 = ~6 months)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+        
+        Returns:
+            DataFrame with one row per stock and pair that crossed in the past week
+        """
+        end_date = datetime.now()
+        longest = max(long_window for _, long_window, _ in pairs)
+        start_date = end_date - timedelta(days=lookback_days + longest)
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        closes = self._load_closes(symbols, start_date, end_date, chunk_size, progress_bar, status_text)
+        
+        status_text.text(f"Detecting crosses for {len(pairs)} pairs across {len(closes.columns)} stocks...")
+        crosses = self.compute.run(scan_pairs, closes, pairs=pairs)
+        one_week_ago = end_date - timedelta(days=7)
+        recent = crosses[crosses['Last_Cross_Date'] >= one_week_ago]
+        
+        return self._pair_rows(recent, lambda pair: pair, progress_bar, status_text)
+    
+    def analyze_timeframe(self, symbols, timeframe, pairs, lookback_periods=26, chunk_size=None):
+        """
+        Analyze stocks for weekly or monthly moving-average crosses
+        
+        Bars are resampled from the daily closes in the price store, so no
+        extra data is downloaded. Resampled closes are cached per timeframe and
+        later scans only load the daily bars of the last two periods.
+        
+        Args:
+            symbols: List of stock symbols to analyze
+            timeframe: 'Weekly' or 'Monthly'
+            pairs: List of (short_window, long_window, kind), windows counted in bars of the timeframe
+            lookback_periods: Number of bars to look back beyond the longest window (default 26)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+        
+        Returns:
+            DataFrame with one row per stock and pair that crossed in the past week (weekly)
+            or month (monthly)
+        """
+        end_date = datetime.now()
+        bar_days = TIMEFRAME_DAYS[timeframe]
+        longest = max(long_window for _, long_window, _ in pairs)
+        full_start = end_date - timedelta(days=(lookback_periods + longest) * bar_days)
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        cache = ResampledCloseCache(timeframe)
+        starts = cache.daily_starts(symbols, full_start)
+        by_start = {}
+        for symbol, start in starts.items():
+            by_start.setdefault(start, []).append(symbol)
+        
+        frames = []
+        stale = []
+        last_date = None
+        for start, group in sorted(by_start.items()):
+            daily = self._load_closes(group, start, end_date, chunk_size, progress_bar, status_text)
+            if not daily.empty:
+                last_date = max(last_date or daily.index.max(), daily.index.max())
+            incremental = group if start > pd.Timestamp(full_start) else ()
+            resampled, group_stale = cache.update(daily, incremental)
+            frames.append(resampled)
+            stale.extend(group_stale)
+        
+        if stale:
+            # Re-adjusted histories no longer match their cached bars and are rebuilt
+            daily = self._load_closes(stale, full_start, end_date, chunk_size, progress_bar, status_text)
+            frames.append(cache.update(daily)[0])
+        
+        closes = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+        if last_date is not None:
+            closes = label_open_period(closes, last_date)
+        
+        status_text.text(f"Detecting {timeframe.lower()} crosses across {len(closes.columns)} stocks...")
+        crosses = self.compute.run(scan_pairs, closes, pairs=pairs)
+        recent = crosses[crosses['Last_Cross_Date'] >= end_date - timedelta(days=bar_days)]
+        
+        return self._pair_rows(recent, lambda pair: f"{timeframe} {pair}", progress_bar, status_text)
+    
+    def _pair_rows(self, crosses, label_fn, progress_bar, status_text):
+        """
+        Turn the recent crosses of a pair scan into the sorted result table
+        
+        Args:
+            crosses: scan_pairs rows indexed by (Symbol, Pair), already filtered to recent crosses
+            label_fn: Function mapping a pair name to the label shown in the Pair column
+            progress_bar: Streamlit progress bar to clear when done
+            status_text: Streamlit text element for status messages
+        
+        Returns:
+            DataFrame with one row per stock and pair, newest crosses first
+        """
+        results = []
+        for (symbol, pair), cross in crosses.iterrows():
+            results.append({
+                'Symbol': symbol,
+                'Pair': label_fn(pair),
+                'Company': symbol,
+                'Cross_Type': cross['Last_Cross_Type'],
+                'Cross_Date': cross['Last_Cross_Date'].strftime('%Y-%m-%d'),
+                'Current_Price': round(cross['Close'], 2),
+                'MA_Short': round(cross['MA_Short'], 2),
+                'MA_Long': round(cross['MA_Long'], 2),
+                'Forward_PE': None,
+                'PE_Ratio': None,
+                'Market_Cap_B': None
+            })
+        
+        if results:
+            status_text.text(f"Fetching valuation data for {crosses.index.get_level_values('Symbol').nunique()} stocks with crosses...")
+            self._add_fundamentals(results)
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        if results:
+            df = pd.DataFrame(results)
+            df = df.sort_values(['Cross_Date', 'Symbol'], ascending=[False, True])
+            return df
+        else:
+            return pd.DataFrame()
+    
+    def scan_indicators(self, symbols, scanners, lookback_days=400, chunk_size=None):
+        """
+        Run indicator scanners (MACD, Bollinger, momentum, 52-week high, ...) over the universe
+        
+        Every indicator the scanners declare is computed once over the whole
+        close matrix, however many scanners read it.
+        
+        Args:
+            symbols: List of stock symbols to analyze
+            scanners: List of Scanner instances
+            lookback_days: Calendar days of daily bars to load (default 400, enough for 52-week highs)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+        
+        Returns:
+            DataFrame with one row per stock and matching scanner
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=lookback_days)
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        fields = {'Close': {}, 'High': {}, 'Low': {}}
+        for chunk, bars in self._iter_bar_chunks(symbols, start_date, end_date, chunk_size, progress_bar, status_text):
+            for symbol, symbol_bars in bars.items():
+                for field, columns in fields.items():
+                    columns[symbol] = symbol_bars[field]
+        
+        if not fields['Close']:
+            progress_bar.empty()
+            status_text.empty()
+            return pd.DataFrame()
+        
+        status_text.text(f"Computing indicators across {len(fields['Close'])} stocks...")
+        frame = IndicatorFrame(*(pd.DataFrame(fields[field]) for field in ('Close', 'High', 'Low')))
+        hits = run_scanners(frame, scanners)
+        
+        results = []
+        for _, hit in hits.iterrows():
+            row = {
+                'Symbol': hit['Symbol'],
+                'Company': hit['Symbol'],
+                'Scanner': hit['Scanner'],
+                'Signal': hit['Signal'],
+                'Current_Price': round(hit['Close'], 2),
+            }
+            for name in hits.columns[4:]:
+                row[name] = round(hit[name], 3) if pd.notna(hit[name]) else None
+            row.update({'Forward_PE': None, 'PE_Ratio': None, 'Market_Cap_B': None})
+            results.append(row)
+        
+        if results:
+            status_text.text(f"Fetching valuation data for {hits['Symbol'].nunique()} stocks with signals...")
+            self._add_fundamentals(results)
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        return pd.DataFrame(results)
+    
+    def find_converging(self, symbols, lookback_days=180, slope_days=10, max_days=30, chunk_size=None):
+        """
+        Rank stocks whose 50/200-day averages are converging towards a cross
+        
+        Args:
+            symbols: List of stock symbols to analyze
+            lookback_days: Number of days to look back for price data (default 180 = ~6 months)
+            slope_days: Trading days over which the spread slope is measured (default 10)
+            max_days: Only keep stocks projected to cross within this many trading days (default 30)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+        
+        Returns:
+            DataFrame of converging stocks, nearest projected cross first
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=lookback_days + self.long_ma)
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        closes = self._load_closes(symbols, start_date, end_date, chunk_size, progress_bar, status_text)
+        
+        status_text.text(f"Ranking moving-average spreads across {len(closes.columns)} stocks...")
+        ranked = self.compute.run(
+            converging, closes, short_window=self.short_ma, long_window=self.long_ma, slope_days=slope_days
+        ).sort_values('Days_To_Cross')
+        ranked = ranked[ranked['Days_To_Cross'] <= max_days]
+        
+        results = []
+        for symbol, row in ranked.iterrows():
+            results.append({
+                'Symbol': symbol,
+                'Company': symbol,
+                'Expected_Cross': row['Expected_Cross'],
+                'Days_To_Cross': round(row['Days_To_Cross'], 1),
+                'Spread_Pct': round(row['Spread_Pct'], 2),
+                'Slope_Pct': round(row['Slope_Pct'], 3),
+                'Current_Price': round(row['Close'], 2),
+                'MA50': round(row['MA_Short'], 2),
+                'MA200': round(row['MA_Long'], 2),
+                'Forward_PE': None,
+                'PE_Ratio': None,
+                'Market_Cap_B': None
+            })
+        
+        if results:
+            status_text.text(f"Fetching valuation data for {len(results)} converging stocks...")
+            self._add_fundamentals(results)
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        return pd.DataFrame(results)
+    
+    def _refresh_order(self, symbols):
+        """
+        Order symbols so those nearest a cross at the last scan are refreshed first
+        
+        Uses the stored moving-average state, so ranking costs no price data;
+        symbols without state keep their order at the end.
+        """
+        states = self.ma_states.load()
+        
+        def gap(symbol):
+            state = states.get(symbol)
+            if state is None or not state.ma_long:
+                return np.inf
+            return abs(state.ma_short - state.ma_long) / state.ma_long
+        
+        return sorted(symbols, key=gap)
+    
+    def backtest(self, symbols, years=20, horizons=HORIZONS, chunk_size=None):
+        """
+        Measure forward returns after every historical cross of the index constituents
+        
+        Args:
+            symbols: List of stock symbols to backtest
+            years: Years of price history to backtest over (default 20)
+            horizons: Trading-day horizons for forward returns (default 5/20/60/120)
+            chunk_size: Number of symbols per multi-ticker download (default self.chunk_size)
+        
+        Returns:
+            Tuple of (DataFrame of every cross with its forward returns, summary DataFrame
+            of hit rates and return statistics per cross type and horizon)
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(years * 365.25))
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        closes = self._load_closes(symbols, start_date, end_date, chunk_size, progress_bar, status_text)
+        
+        status_text.text(f"Backtesting crosses across {len(closes.columns)} stocks...")
+        events = self.compute.run(
+            cross_forward_returns, closes, short_window=self.short_ma, long_window=self.long_ma, horizons=horizons
+        ).sort_values('Cross_Date', ascending=False, ignore_index=True)
+        summary = summarize_returns(events, horizons)
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        return events, summary
+    
+    def _load_closes(self, symbols, start_date, end_date, chunk_size, progress_bar, status_text):
+        """
+        Load closes for all symbols through the price store in chunked downloads
+        
+        Returns:
+            DataFrame of closes, indexed by date with one column per symbol that has data
+        """
+        chunks = [closes for _, closes, _ in self._iter_close_chunks(symbols, start_date, end_date, chunk_size, progress_bar, status_text)]
+        chunks = [closes for closes in chunks if not closes.empty]
+        return pd.concat(chunks, axis=1) if chunks else pd.DataFrame()
+    
+    def _iter_close_chunks(self, symbols, start_date, end_date, chunk_size, progress_bar, status_text, first_chunk_size=25):
+        """
+        Yield closes and volumes chunk by chunk as the price store delivers them
+        
+        Yields:
+            Tuple of (symbols in the chunk, DataFrame of their closes and DataFrame of
+            their volumes, each indexed by date with one column per symbol that has data)
+        """
+        for chunk, bars in self._iter_bar_chunks(symbols, start_date, end_date, chunk_size, progress_bar, status_text, first_chunk_size):
+            closes = pd.DataFrame({symbol: bars[symbol]['Close'] for symbol in chunk if symbol in bars})
+            volumes = pd.DataFrame({symbol: bars[symbol]['Volume'] for symbol in chunk if symbol in bars})
+            yield chunk, closes, volumes
+    
+    def _iter_bar_chunks(self, symbols, start_date, end_date, chunk_size, progress_bar, status_text, first_chunk_size=25):
+        """
+        Yield daily bars chunk by chunk as the price store delivers them
+        
+        Symbols nearest a cross at the last scan are downloaded first, in a
+        smaller first chunk so their results can be shown straight away.
+        
+        Yields:
+            Tuple of (symbols in the chunk, dict of symbol -> OHLCV DataFrame for symbols with data)
+        """
+        chunk_size = chunk_size or self.chunk_size
+        symbols = self._refresh_order(symbols)
+        total_symbols = len(symbols)
+        
+        chunk_start = 0
+        while chunk_start < total_symbols:
+            size = min(chunk_size, first_chunk_size) if chunk_start == 0 else chunk_size
+            chunk = list(symbols[chunk_start:chunk_start + size])
+            status_text.text(f"Downloading prices for {len(chunk)} symbols... ({chunk_start + 1}-{chunk_start + len(chunk)}/{total_symbols})")
+            progress_bar.progress((chunk_start + len(chunk)) / total_symbols)
+            chunk_start += size
             
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+            try:
+                bars = self.store.get_many(chunk, start_date, end_date)
+            except Exception as e:
+                # A failed chunk only loses its own symbols, the scan carries on
+                logging.warning(f"Exception of type {type(e).__name__} occurred downloading chunk starting at {chunk[0]}: {e}")
+                bars = {}
             
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
+            for symbol in chunk:
+                if symbol not in bars:
+                    logging.warning(f"no history for {symbol}")
             
-            return rsi.iloc[-1] if not rsi.empty else None
+            yield chunk, bars
+    
+    def _find_crosses(self, closes, end_date, rsi_range=None, volumes=None, min_relative_volume=None,
+                      ma_states=None, rsi_states=None):
+        """
+        Find stocks whose moving averages crossed in the past week
+        
+        Args:
+            closes: DataFrame of closes, indexed by date with one column per symbol
+            end_date: Date the scan is run as of
+            rsi_range: Optional (min, max) tuple of RSI values to keep
+            volumes: Optional DataFrame of volumes shaped like closes, for relative volume
+            min_relative_volume: Optional minimum cross-day or cross-week relative volume to keep
+            ma_states: Optional moving-average states loaded for the whole scan, updated in place
+            rsi_states: Optional RSI states loaded for the whole scan, updated in place
+        
+        Returns:
+            List of result rows, one per stock with a recent cross
+        """
+        if closes.empty:
+            return []
+        
+        # Stored running sums make a daily rescan O(1) per symbol; only new symbols are seeded
+        states = self.ma_states.update(closes, ma_states)
+        # Wilder RSI for the whole universe in one pass, also O(1) per symbol once seeded
+        rsi_values = self.rsi_states.update(closes, rsi_states)
+        one_week_ago = end_date - timedelta(days=7)
+        
+        crossers = {
+            symbol: state for symbol, state in states.items()
+            if state.last_cross_date is not None and state.last_cross_date >= one_week_ago
+        }
+        # Volume comes with the same bars as the closes, so confirmation costs no extra request
+        rel_volume = relative_volume(
+            volumes if volumes is not None else pd.DataFrame(),
+            {symbol: state.last_cross_date for symbol, state in crossers.items()}
+        )
+        
+        results = []
+        for symbol, state in crossers.items():
+            day_volume = rel_volume['Rel_Volume_Day'].get(symbol, np.nan)
+            week_volume = rel_volume['Rel_Volume_Week'].get(symbol, np.nan)
+            if min_relative_volume is not None and not (day_volume >= min_relative_volume or week_volume >= min_relative_volume):
+                continue
             
-        except Exception as e:
-            return None
+            rsi = rsi_values.get(symbol)
+            if rsi is not None and np.isnan(rsi):
+                rsi = None
+            if rsi_range is not None and (rsi is None or not rsi_range[0] <= rsi <= rsi_range[1]):
+                continue
+            
+            results.append({
+                'Symbol': symbol,
+                'Company': symbol,
+                'Cross_Type': state.last_cross_type,
+                'Cross_Date': state.last_cross_date.strftime('%Y-%m-%d'),
+                'Current_Price': round(state.last_close, 2),
+                'MA50': round(state.ma_short, 2),
+                'MA200': round(state.ma_long, 2),
+                'RSI': round(rsi, 2) if rsi else None,
+                'Rel_Volume_Day': round(day_volume, 2) if pd.notna(day_volume) else None,
+                'Rel_Volume_Week': round(week_volume, 2) if pd.notna(week_volume) else None,
+                'Forward_PE': None,
+                'PE_Ratio': None,
+                'Market_Cap_B': None
+            })
+        
+        return results
+    
+    def _add_fundamentals(self, results):
+        """Fill company name and valuation fields for cross results from the fundamentals cache"""
+        rows_by_symbol = {}
+        for row in results:
+            rows_by_symbol.setdefault(row['Symbol'], []).append(row)
+        fields = ['longName', 'forwardPE', 'trailingPE', 'marketCap']
+        
+        for symbol, info in self.fundamentals.iter_info(rows_by_symbol, fields, self.executor):
+            try:
+                forward_pe = _finite(info.get('forwardPE'))
+                pe_ratio = _finite(info.get('trailingPE'))
+                market_cap = _finite(info.get('marketCap'))
+                
+                for row in rows_by_symbol[symbol]:
+                    row['Company'] = info.get('longName') or symbol
+                    row['Forward_PE'] = round(forward_pe, 2) if forward_pe else None
+                    row['PE_Ratio'] = round(pe_ratio, 2) if pe_ratio else None
+                    row['Market_Cap_B'] = round(market_cap / 1e9, 2) if market_cap else None
+            except Exception as e:
+                logging.warning(f"Could not add valuation data for {symbol}: {e}")
+
+
+def _finite(value):
+    """Value as a float, or None if it is missing or not a finite number (Yahoo sends e.g. 'Infinity')"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
@@ -0,0 +1,290 @@
+import numpy as np
+import pandas as pd
+
+
+def prepare_closes(closes):
+    """
+    Align a dates × symbols close matrix for the array engines
+    
+    Sorts by date and forward-fills gaps inside each symbol's history (a missed
+    print or a local holiday), so moving-average windows stay contiguous.
+    Leading NaNs before a symbol's first close are kept.
+    """
+    return closes.sort_index().ffill().astype(float)
+
+
+def cumulative_sums(values):
+    """
+    Prefix sums of values and of valid-value counts down axis 0, with a leading zero row
+    
+    Computed once per close matrix and shared by every moving-average window.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    
+    zeros = np.zeros((1,) + values.shape[1:])
+    csum = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    ccount = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    return csum, ccount
+
+
+def window_mean(csum, ccount, window):
+    """Trailing simple moving average from precomputed cumulative sums"""
+    out = np.full((len(csum) - 1,) + csum.shape[1:], np.nan)
+    if len(csum) - 1 >= window:
+        sums = csum[window:] - csum[:-window]
+        counts = ccount[window:] - ccount[:-window]
+        out[window - 1:] = np.where(counts == window, sums / window, np.nan)
+    
+    return out
+
+
+def rolling_mean(values, window):
+    """
+    Trailing simple moving average down axis 0 of a dates × symbols array
+    
+    Uses one cumulative sum per column; a row is NaN until the window holds
+    `window` valid values.
+    """
+    return window_mean(*cumulative_sums(values), window)
+
+
+def exponential_mean(values, window):
+    """
+    Exponential moving average (span = window) down axis 0 of a dates × symbols array
+    
+    NaN until a symbol has `window` closes, like the simple average.
+    """
+    return pd.DataFrame(values).ewm(span=window, adjust=False, min_periods=window).mean().to_numpy()
+
+
+def cross_signals(ma_short, ma_long):
+    """
+    Signal state and cross events from two moving-average arrays
+    
+    Returns:
+        Tuple of (signal, cross) arrays: signal is 1 where the short average is
+        above the long one, -1 where it is not and 0 where either is undefined;
+        cross is +2 on a golden cross, -2 on a death cross and 0 elsewhere
+    """
+    defined = ~np.isnan(ma_short) & ~np.isnan(ma_long)
+    signal = np.where(defined, np.where(ma_short > ma_long, 1, -1), 0).astype(np.int8)
+    
+    cross = np.zeros(signal.shape, dtype=np.int8)
+    both_defined = (signal[1:] != 0) & (signal[:-1] != 0)
+    cross[1:] = np.where(both_defined, signal[1:] - signal[:-1], 0)
+    
+    return signal, cross
+
+
+def last_crosses(closes, short_window=50, long_window=200):
+    """
+    Detect golden and death crosses for a whole universe in one array pass
+    
+    Args:
+        closes: DataFrame of closes, indexed by date with one column per symbol
+        short_window: Short moving-average window (default 50)
+        long_window: Long moving-average window (default 200)
+    
+    Returns:
+        DataFrame indexed by symbol with the latest Close, MA_Short, MA_Long,
+        Signal, and the Last_Cross_Date / Last_Cross_Type (NaT / None if the
+        averages never crossed in the data)
+    """
+    columns = ['Close', 'MA_Short', 'MA_Long', 'Signal', 'Last_Cross_Date', 'Last_Cross_Type']
+    if closes.empty:
+        return pd.DataFrame(columns=columns, index=closes.columns)
+    
+    closes = prepare_closes(closes)
+    values = closes.to_numpy()
+    
+    ma_short = rolling_mean(values, short_window)
+    ma_long = rolling_mean(values, long_window)
+    signal, cross = cross_signals(ma_short, ma_long)
+    
+    last_date, last_type = _last_cross(cross, closes.index)
+    
+    return pd.DataFrame({
+        'Close': values[-1],
+        'MA_Short': ma_short[-1],
+        'MA_Long': ma_long[-1],
+        'Signal': signal[-1],
+        'Last_Cross_Date': last_date,
+        'Last_Cross_Type': last_type,
+    }, index=closes.columns, columns=columns)
+
+
+def _last_cross(cross, dates):
+    """Date and type of the most recent cross per column of a cross-event array"""
+    # Row of the most recent cross per symbol, -1 where there was none
+    rows = np.arange(len(cross))[:, None]
+    last_row = np.where(cross != 0, rows, -1).max(axis=0)
+    has_cross = last_row >= 0
+    last_type = cross[np.maximum(last_row, 0), np.arange(cross.shape[1])] * has_cross
+    last_date = dates.to_numpy()[np.maximum(last_row, 0)]
+    
+    return (
+        pd.to_datetime(np.where(has_cross, last_date, np.datetime64('NaT'))),
+        np.where(last_type == 2, 'Golden Cross', np.where(last_type == -2, 'Death Cross', None))
+    )
+
+
+def pair_label(short_window, long_window, kind='SMA'):
+    """Display label for a moving-average pair, e.g. 'SMA 50/200'"""
+    return f"{kind} {short_window}/{long_window}"
+
+
+def scan_pairs(closes, pairs):
+    """
+    Detect crosses for several moving-average pairs over one close matrix
+    
+    Simple averages for every window come from one shared set of cumulative
+    sums, and each distinct window is computed once however many pairs use it.
+    
+    Args:
+        closes: DataFrame of closes, indexed by date with one column per symbol
+        pairs: List of (short_window, long_window, kind) with kind 'SMA' or 'EMA'
+    
+    Returns:
+        DataFrame indexed by (Symbol, Pair) with Close, MA_Short, MA_Long,
+        Signal, Last_Cross_Date and Last_Cross_Type
+    """
+    columns = ['Close', 'MA_Short', 'MA_Long', 'Signal', 'Last_Cross_Date', 'Last_Cross_Type']
+    if closes.empty or not pairs:
+        return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_tuples([], names=['Symbol', 'Pair']))
+    
+    closes = prepare_closes(closes)
+    values = closes.to_numpy()
+    csum, ccount = cumulative_sums(values)
+    
+    averages = {}
+    def average(window, kind):
+        if (window, kind) not in averages:
+            if kind == 'EMA':
+                averages[(window, kind)] = exponential_mean(values, window)
+            else:
+                averages[(window, kind)] = window_mean(csum, ccount, window)
+        return averages[(window, kind)]
+    
+    frames = []
+    for short_window, long_window, kind in pairs:
+        ma_short = average(short_window, kind)
+        ma_long = average(long_window, kind)
+        signal, cross = cross_signals(ma_short, ma_long)
+        last_date, last_type = _last_cross(cross, closes.index)
+        
+        frame = pd.DataFrame({
+            'Close': values[-1],
+            'MA_Short': ma_short[-1],
+            'MA_Long': ma_long[-1],
+            'Signal': signal[-1],
+            'Last_Cross_Date': last_date,
+            'Last_Cross_Type': last_type,
+        }, index=closes.columns, columns=columns)
+        frame.index.name = 'Symbol'
+        frame['Pair'] = pair_label(short_window, long_window, kind)
+        frames.append(frame.reset_index())
+    
+    return pd.concat(frames, ignore_index=True).set_index(['Symbol', 'Pair'])
+
+
+def converging(closes, short_window=50, long_window=200, slope_days=10):
+    """
+    Rank symbols by how close their moving averages are to crossing
+    
+    The spread MA_Short − MA_Long and its average daily change over the last
+    `slope_days` bars are computed for the whole universe in one pass. Where
+    the spread is shrinking towards zero, a linear projection gives the
+    number of trading days until the averages would cross.
+    
+    Args:
+        closes: DataFrame of closes, indexed by date with one column per symbol
+        short_window: Short moving-average window (default 50)
+        long_window: Long moving-average window (default 200)
+        slope_days: Bars over which the spread slope is measured (default 10)
+    
+    Returns:
+        DataFrame indexed by symbol with Close, MA_Short, MA_Long, Spread_Pct
+        (spread as % of MA_Long), Slope_Pct (daily change of Spread_Pct),
+        Days_To_Cross (inf where the averages are diverging) and Expected_Cross,
+        sorted by Days_To_Cross
+    """
+    columns = ['Close', 'MA_Short', 'MA_Long', 'Spread_Pct', 'Slope_Pct', 'Days_To_Cross', 'Expected_Cross']
+    if len(closes) <= slope_days:
+        return pd.DataFrame(columns=columns, index=closes.columns)
+    
+    closes = prepare_closes(closes)
+    values = closes.to_numpy()
+    csum, ccount = cumulative_sums(values)
+    ma_short = window_mean(csum, ccount, short_window)
+    ma_long = window_mean(csum, ccount, long_window)
+    
+    spread_pct = (ma_short - ma_long) / ma_long * 100
+    now = spread_pct[-1]
+    slope = (now - spread_pct[-1 - slope_days]) / slope_days
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = -now / slope
+    # Only a spread moving towards zero projects a cross
+    days = np.where((days > 0) & np.isfinite(days), days, np.inf)
+    
+    ranked = pd.DataFrame({
+        'Close': values[-1],
+        'MA_Short': ma_short[-1],
+        'MA_Long': ma_long[-1],
+        'Spread_Pct': now,
+        'Slope_Pct': slope,
+        'Days_To_Cross': days,
+        'Expected_Cross': np.where(now < 0, 'Golden Cross', 'Death Cross'),
+    }, index=closes.columns, columns=columns)
+    
+    return ranked[~np.isnan(now)].sort_values('Days_To_Cross')
+
+
+def relative_volume(volumes, cross_dates, window=50, week=5):
+    """
+    Volume on and after a cross relative to the trailing average before it
+    
+    Args:
+        volumes: DataFrame of daily volumes, indexed by date with one column per symbol
+        cross_dates: Dict of symbol -> cross date
+        window: Trading days in the trailing average, ending the day before the cross (default 50)
+        week: Trading days from the cross day averaged for the cross-week figure (default 5)
+    
+    Returns:
+        DataFrame indexed by symbol with Rel_Volume_Day and Rel_Volume_Week
+        (NaN where the cross date is missing or there is no trailing history)
+    """
+    columns = ['Rel_Volume_Day', 'Rel_Volume_Week']
+    symbols = [symbol for symbol in cross_dates if symbol in volumes.columns]
+    if not symbols:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='Symbol'))
+    
+    volumes = volumes[symbols].sort_index().astype(float)
+    values = volumes.to_numpy()
+    csum, ccount = cumulative_sums(values)
+    
+    # Row of each symbol's cross day, -1 where the date is not in the data
+    rows = volumes.index.get_indexer(pd.DatetimeIndex([cross_dates[symbol] for symbol in symbols]))
+    cols = np.arange(len(symbols))
+    found = rows >= 0
+    rows = np.where(found, rows, 0)
+    
+    # Trailing average over the window before the cross day, from the prefix sums
+    start = np.maximum(rows - window, 0)
+    trailing_count = ccount[rows, cols] - ccount[start, cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trailing = (csum[rows, cols] - csum[start, cols]) / trailing_count
+        
+        # The cross week may still be in progress, so average the days there are
+        stop = np.minimum(rows + week, len(values))
+        week_mean = (csum[stop, cols] - csum[rows, cols]) / (ccount[stop, cols] - ccount[rows, cols])
+        
+        day = values[rows, cols] / trailing
+        week_ratio = week_mean / trailing
+    
+    usable = found & (trailing_count > 0) & (trailing > 0)
+    return pd.DataFrame({
+        'Rel_Volume_Day': np.where(usable, day, np.nan),
+        'Rel_Volume_Week': np.where(usable, week_ratio, np.nan),
+    }, index=pd.Index(symbols, name='Symbol'), columns=columns)
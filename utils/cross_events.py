@@ -0,0 +1,255 @@
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_paths import cache_path
+from utils.cross_engine import prepare_closes, rolling_mean, cross_signals
+from utils.price_store import PriceStore
+
+HISTORY_START = datetime(2000, 1, 1)
+
+
+class CrossEventIndex:
+    """
+    Persisted table of every golden and death cross per symbol over its full price history.
+    
+    Events are computed from the price store once and then extended as new bars
+    arrive: each update only rescans a warm-up window before the last processed
+    date of a symbol. Symbols are tagged with the indices they were loaded for,
+    so a question like "all Nasdaq 100 crosses in March 2020" is a lookup on
+    the (cross_date) index rather than a rescan of prices.
+    """
+    
+    def __init__(self, short_window=50, long_window=200, path=None, store=None):
+        self.short_window = short_window
+        self.long_window = long_window
+        self.path = path or cache_path(f"cross_events_{short_window}_{long_window}.sqlite")
+        self.store = store or PriceStore()
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cross_events (
+                    symbol TEXT NOT NULL,
+                    cross_date TEXT NOT NULL,
+                    cross_type TEXT NOT NULL,
+                    close REAL,
+                    ma_short REAL,
+                    ma_long REAL,
+                    PRIMARY KEY (symbol, cross_date)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS cross_events_date ON cross_events (cross_date)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS index_members (
+                    index_name TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    PRIMARY KEY (index_name, symbol)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS coverage (
+                    symbol TEXT PRIMARY KEY,
+                    first_date TEXT NOT NULL,
+                    last_date TEXT NOT NULL
+                )
+            ''')
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+    
+    def coverage(self, symbols):
+        """Return {symbol: (first_date, last_date)} for symbols already processed"""
+        symbols = list(symbols)
+        covered = {}
+        with self._connect() as conn:
+            for start in range(0, len(symbols), 500):
+                chunk = symbols[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT symbol, first_date, last_date FROM coverage "
+                    f"WHERE symbol IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                covered.update((symbol, (pd.Timestamp(first), pd.Timestamp(last))) for symbol, first, last in rows)
+        
+        return covered
+    
+    def update(self, index_name, symbols, chunk_size=100, end_date=None, history_start=HISTORY_START):
+        """
+        Bring the event table up to date for the constituents of an index
+        
+        Symbols seen for the first time are processed from `history_start`;
+        known symbols only reload enough bars before their last processed date
+        for the long moving average to be defined again.
+        
+        Args:
+            index_name: Index the symbols belong to (used for lookups)
+            symbols: List of constituent symbols
+            chunk_size: Number of symbols per price-store request
+            end_date: Date to process up to (default now)
+            history_start: Earliest date for symbols without stored events
+        
+        Returns:
+            Number of new cross events recorded
+        """
+        end_date = end_date or datetime.now()
+        symbols = list(dict.fromkeys(symbols))
+        
+        with self._connect() as conn:
+            conn.execute('DELETE FROM index_members WHERE index_name = ?', (index_name,))
+            conn.executemany(
+                'INSERT INTO index_members (index_name, symbol) VALUES (?, ?)',
+                [(index_name, symbol) for symbol in symbols]
+            )
+        
+        covered = self.coverage(symbols)
+        # Calendar days comfortably holding long_window trading days
+        warmup = timedelta(days=int(self.long_window * 1.6) + 10)
+        
+        windows = {}
+        for symbol in symbols:
+            if symbol in covered:
+                windows.setdefault(covered[symbol][1] - warmup, []).append(symbol)
+            else:
+                windows.setdefault(pd.Timestamp(history_start), []).append(symbol)
+        
+        recorded = 0
+        for start_date, group in windows.items():
+            for chunk_start in range(0, len(group), chunk_size):
+                chunk = group[chunk_start:chunk_start + chunk_size]
+                try:
+                    bars = self.store.get_many(chunk, start_date, end_date)
+                except Exception as e:
+                    logging.warning(f"Could not load prices for cross history starting at {chunk[0]}: {e}")
+                    continue
+                
+                closes = pd.DataFrame({symbol: bars[symbol]['Close'] for symbol in chunk if symbol in bars})
+                since = {symbol: covered[symbol][1] for symbol in closes.columns if symbol in covered}
+                recorded += self.record(closes, since)
+        
+        return recorded
+    
+    def record(self, closes, since=None):
+        """
+        Detect crosses in a close matrix and store them
+        
+        Args:
+            closes: DataFrame of closes, indexed by date with one column per symbol
+            since: Optional {symbol: date}; only events from that date on are replaced
+                for those symbols (their earlier history is already stored)
+        
+        Returns:
+            Number of cross events written
+        """
+        if closes.empty:
+            return 0
+        since = since or {}
+        
+        # Coverage comes from the real bars, not the forward-filled matrix below
+        coverage = []
+        for symbol in closes.columns:
+            valid = closes[symbol].dropna()
+            if valid.empty:
+                continue
+            coverage.append((symbol, valid.index[0].strftime('%Y-%m-%d'), valid.index[-1].strftime('%Y-%m-%d')))
+        
+        closes = prepare_closes(closes)
+        values = closes.to_numpy()
+        ma_short = rolling_mean(values, self.short_window)
+        ma_long = rolling_mean(values, self.long_window)
+        _, cross = cross_signals(ma_short, ma_long)
+        dates = closes.index
+        
+        rows, cols = np.nonzero(cross)
+        events = [
+            (
+                closes.columns[c],
+                dates[r].strftime('%Y-%m-%d'),
+                'Golden Cross' if cross[r, c] > 0 else 'Death Cross',
+                float(values[r, c]),
+                float(ma_short[r, c]),
+                float(ma_long[r, c]),
+            )
+            for r, c in zip(rows, cols)
+            # The last processed day is recomputed too, in case its bar has changed since
+            if closes.columns[c] not in since or dates[r] >= since[closes.columns[c]]
+        ]
+        
+        with self._connect() as conn:
+            for symbol, first_date, _ in coverage:
+                # Replace what this pass recomputed, keep older events of incremental updates
+                replace_from = since[symbol].strftime('%Y-%m-%d') if symbol in since else first_date
+                conn.execute('DELETE FROM cross_events WHERE symbol = ? AND cross_date >= ?', (symbol, replace_from))
+            conn.executemany(
+                'INSERT OR REPLACE INTO cross_events (symbol, cross_date, cross_type, close, ma_short, ma_long) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                events
+            )
+            conn.executemany(
+                'INSERT INTO coverage (symbol, first_date, last_date) VALUES (?, ?, ?) '
+                'ON CONFLICT (symbol) DO UPDATE SET '
+                'first_date = MIN(first_date, excluded.first_date), last_date = excluded.last_date',
+                coverage
+            )
+        
+        return len(events)
+    
+    def query(self, index_name=None, start_date=None, end_date=None, cross_type=None, symbols=None):
+        """
+        Look up stored cross events
+        
+        Args:
+            index_name: Only symbols last loaded for this index
+            start_date: Earliest cross date (inclusive)
+            end_date: Latest cross date (inclusive)
+            cross_type: 'Golden Cross' or 'Death Cross'
+            symbols: Only these symbols
+        
+        Returns:
+            DataFrame with Symbol, Cross_Date, Cross_Type, Close, MA_Short and MA_Long,
+            newest first
+        """
+        sql = 'SELECT e.symbol, e.cross_date, e.cross_type, e.close, e.ma_short, e.ma_long FROM cross_events e'
+        clauses, params = [], []
+        if index_name is not None:
+            sql += ' JOIN index_members m ON m.symbol = e.symbol'
+            clauses.append('m.index_name = ?')
+            params.append(index_name)
+        if start_date is not None:
+            clauses.append('e.cross_date >= ?')
+            params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+        if end_date is not None:
+            clauses.append('e.cross_date <= ?')
+            params.append(pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+        if cross_type is not None:
+            clauses.append('e.cross_type = ?')
+            params.append(cross_type)
+        if symbols is not None:
+            symbols = list(symbols)
+            clauses.append(f"e.symbol IN ({','.join('?' * len(symbols))})")
+            params.extend(symbols)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY e.cross_date DESC, e.symbol'
+        
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        
+        df = pd.DataFrame(rows, columns=['Symbol', 'Cross_Date', 'Cross_Type', 'Close', 'MA_Short', 'MA_Long'])
+        df['Cross_Date'] = pd.to_datetime(df['Cross_Date'])
+        return df
+    
+    def last_cross(self, symbol):
+        """Most recent stored cross for a symbol as a dict, or None"""
+        events = self.query(symbols=[symbol])
+        return events.iloc[0].to_dict() if not events.empty else None
@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token and blocks until one is available.
+    """
+    
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """Block until `tokens` tokens are available, then take them"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                
+                wait = (tokens - self.tokens) / self.rate
+            
+            time.sleep(wait)
+
+
+# Yahoo starts answering 429s somewhere above a handful of requests per second
+# from one address, so every session in the process shares one bucket.
+DEFAULT_WORKERS = int(os.environ.get('TRADE_IDEAS_FETCH_WORKERS', 8))
+DEFAULT_RATE = float(os.environ.get('TRADE_IDEAS_FETCH_RATE', 4))
+DEFAULT_BURST = float(os.environ.get('TRADE_IDEAS_FETCH_BURST', 8))
+
+_shared_bucket = TokenBucket(DEFAULT_RATE, DEFAULT_BURST)
+
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter shared by all Yahoo requests"""
+    return _shared_bucket
+
+
+class FetchExecutor:
+    """
+    Bounded-concurrency executor for network fetches.
+    
+    Live Yahoo calls are already rate limited by the data provider; pass a
+    limiter only to throttle other work.
+    """
+    
+    def __init__(self, max_workers=None, limiter=None):
+        self.max_workers = max_workers or DEFAULT_WORKERS
+        self.limiter = limiter
+    
+    def _call(self, fn, item):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return fn(item)
+    
+    def map_as_completed(self, fn, items):
+        """
+        Run fn over items concurrently, yielding results as they complete
+        
+        Args:
+            fn: Callable taking a single item (e.g. a symbol)
+            items: Iterable of items to fetch
+        
+        Yields:
+            Tuples of (item, result, error); error is None on success
+        """
+        items = list(items)
+        if not items:
+            return
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            futures = {pool.submit(self._call, fn, item): item for item in items}
+            
+            try:
+                for future in as_completed(futures):
+                    item = futures[future]
+                    try:
+                        yield item, future.result(), None
+                    except Exception as e:
+                        logging.warning(f"Exception of type {type(e).__name__} occurred fetching {item}: {e}")
+                        yield item, None, e
+            finally:
+                # Stop queued work if the consumer abandons the generator early
+                for future in futures:
+                    future.cancel()
@@ -0,0 +1,168 @@
+import json
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+
+from utils.cache_paths import cache_path
+from utils.providers import get_provider
+
+DAY = 24 * 60 * 60
+
+# How long each ticker.info field stays fresh. Prices move daily, so do the
+# ratios derived from them; names, domicile and share counts change rarely.
+FIELD_TTLS = {
+    'marketCap': DAY,
+    'trailingPE': DAY,
+    'forwardPE': DAY,
+    'priceToBook': DAY,
+    'enterpriseValue': DAY,
+    'longName': 7 * DAY,
+    'country': 7 * DAY,
+    'sector': 7 * DAY,
+    'sharesOutstanding': 7 * DAY,
+    'floatShares': 7 * DAY,
+}
+DEFAULT_TTL = DAY
+
+
+class FundamentalsCache:
+    """
+    SQLite-backed cache of ticker.info fields with per-field freshness.
+    
+    Values are stored one row per (symbol, field) so a field can expire
+    without discarding the rest of the record. The database lives in the
+    shared cache directory and uses WAL mode, so every Streamlit session and
+    process on the host reads and writes the same cache.
+    """
+    
+    def __init__(self, path=None, field_ttls=None):
+        self.path = path or cache_path('fundamentals.sqlite')
+        self.field_ttls = field_ttls or FIELD_TTLS
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS fundamentals (
+                    symbol TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, field)
+                )
+            ''')
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+    
+    def get_many(self, symbols, fields):
+        """
+        Read cached fields for several symbols
+        
+        Returns:
+            Dict of symbol -> {field: value} for symbols whose requested fields are all fresh
+        """
+        symbols = list(symbols)
+        fields = list(fields)
+        if not symbols or not fields:
+            return {}
+        
+        rows = []
+        with self._connect() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(symbols), 500):
+                chunk = symbols[start:start + 500]
+                query = (
+                    f"SELECT symbol, field, value, fetched_at FROM fundamentals "
+                    f"WHERE symbol IN ({','.join('?' * len(chunk))}) "
+                    f"AND field IN ({','.join('?' * len(fields))})"
+                )
+                rows.extend(conn.execute(query, chunk + fields).fetchall())
+        
+        now = time.time()
+        cached = {}
+        for symbol, field, value, fetched_at in rows:
+            if now - fetched_at < self.field_ttls.get(field, DEFAULT_TTL):
+                cached.setdefault(symbol, {})[field] = json.loads(value)
+        
+        # Fields recorded as missing are left out, as they would be from ticker.info
+        return {
+            symbol: {field: value for field, value in values.items() if value is not None}
+            for symbol, values in cached.items()
+            if len(values) == len(fields)
+        }
+    
+    def put_many(self, infos, fields=()):
+        """
+        Store ticker.info dicts for several symbols
+        
+        Args:
+            infos: Dict of symbol -> info dict
+            fields: Fields to record as missing (None) when absent from an info dict,
+                so they are not refetched on every read
+        """
+        now = time.time()
+        rows = []
+        for symbol, info in infos.items():
+            values = {field: None for field in fields}
+            values.update(info or {})
+            for field, value in values.items():
+                try:
+                    rows.append((symbol, field, json.dumps(value), now))
+                except (TypeError, ValueError):
+                    continue  # Skip values that are not plain JSON
+        
+        if not rows:
+            return
+        
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO fundamentals (symbol, field, value, fetched_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+    
+    def get_info(self, symbol, fields):
+        """Get fields for one symbol, fetching ticker.info only if a field is stale"""
+        cached = self.get_many([symbol], fields)
+        if symbol in cached:
+            return cached[symbol]
+        
+        info = get_provider().info(symbol)
+        self.put_many({symbol: info}, fields)
+        return self._select(info, fields)
+    
+    def iter_info(self, symbols, fields, executor):
+        """
+        Get fields for several symbols, fetching stale ones concurrently
+        
+        Cached symbols are yielded first, then fetched symbols as they complete.
+        
+        Yields:
+            Tuples of (symbol, {field: value}); symbols whose fetch fails are skipped
+        """
+        symbols = list(symbols)
+        cached = self.get_many(symbols, fields)
+        for symbol in symbols:
+            if symbol in cached:
+                yield symbol, cached[symbol]
+        
+        missing = [symbol for symbol in symbols if symbol not in cached]
+        for symbol, info, error in executor.map_as_completed(get_provider().info, missing):
+            if error is not None or not info:
+                continue
+            
+            try:
+                self.put_many({symbol: info}, fields)
+            except sqlite3.Error as e:
+                logging.warning(f"Could not cache fundamentals for {symbol}: {e}")
+            
+            yield symbol, self._select(info, fields)
+    
+    def _select(self, info, fields):
+        return {field: info[field] for field in fields if info.get(field) is not None}
@@ -1,16 +1,14 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import streamlit as st
 import re
+from utils.constituent_registry import get_registry, INDEX_URLS
+from utils.symbols import to_yahoo_symbol
 
 class IndexDataFetcher:
     """Fetch constituent tickers for various global indices"""
     
     def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        self.registry = get_registry()
     
     @st.cache_data(ttl=3600)
     def get_index_constituents(_self, index_name):
@@ -33,31 +31,12 @@ class IndexDataFetcher:
     def _get_sp500(self):
         """Get S&P 500 constituents from Wikipedia"""
         try:
-            url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table', class_='wikitable')
+            symbols = [to_yahoo_symbol(s, 'S&P 500') for s in self.registry.get_sp500_symbols()]
             
-            if not table:
+            if not symbols:
                 st.error("Could not find S&P 500 table")
                 return []
             
-            symbols = []
-            rows = table.find_all('tr')[1:]
-            
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 1:
-                    try:
-                        symbol = cells[0].get_text().strip()
-                        symbol = re.sub(r'[^\w.-]', '', symbol)
-                        if symbol:
-                            symbols.append(symbol)
-                    except:
-                        continue
-            
             return symbols
             
         except Exception as e:
@@ -67,11 +46,8 @@ class IndexDataFetcher:
     def _get_nasdaq100(self):
         """Get Nasdaq 100 constituents from Wikipedia"""
         try:
-            url = "https://en.wikipedia.org/wiki/Nasdaq-100"
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            url = INDEX_URLS['Nasdaq 100']
+            soup = self.registry.get_page(url)
             table = soup.find('table', {'id': 'constituents'})
             
             if not table:
@@ -91,7 +67,7 @@ class IndexDataFetcher:
                         symbol = cells[0].get_text().strip()
                         symbol = re.sub(r'[^\w.-]', '', symbol)
                         if symbol and symbol not in ['Ticker', 'Symbol']:
-                            symbols.append(symbol)
+                            symbols.append(to_yahoo_symbol(symbol, 'Nasdaq 100'))
                     except:
                         continue
             
@@ -104,11 +80,8 @@ class IndexDataFetcher:
     def _get_russell1000(self):
         """Get Russell 1000 constituents"""
         try:
-            url = "https://en.wikipedia.org/wiki/Russell_1000_Index"
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
+            url = INDEX_URLS['Russell 1000']
+            soup = self.registry.get_page(url)
             table = soup.find('table', {'id': 'constituents'})
 
             if not table:
@@ -128,7 +101,7 @@ class IndexDataFetcher:
                         symbol = cells[1].get_text().strip()
                         symbol = re.sub(r'[^\w.-]', '', symbol)
                         if symbol and symbol not in ['Ticker', 'Symbol']:
-                            symbols.append(symbol)
+                            symbols.append(to_yahoo_symbol(symbol, 'Russell 1000'))
                     except:
                         continue
 
@@ -141,11 +114,8 @@ class IndexDataFetcher:
     def _get_ftse100(self):
         """Get FTSE 100 constituents from Wikipedia"""
         try:
-            url = "https://en.wikipedia.org/wiki/FTSE_100_Index"
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            url = INDEX_URLS['FTSE 100']
+            soup = self.registry.get_page(url)
             table = soup.find('table', {'id': 'constituents'})
             
             if not table:
@@ -163,11 +133,9 @@ class IndexDataFetcher:
                 if len(cells) >= 2:
                     try:
                         symbol = cells[1].get_text().strip()
-                        if '.L' not in symbol:
-                            symbol = symbol + '.L'
                         symbol = re.sub(r'[^\w.-]', '', symbol)
                         if symbol:
-                            symbols.append(symbol)
+                            symbols.append(to_yahoo_symbol(symbol, 'FTSE 100'))
                     except:
                         continue
             
@@ -180,11 +148,8 @@ class IndexDataFetcher:
     def _get_eurostoxx(self):
         """Get Eurostoxx 50 constituents from Wikipedia"""
         try:
-            url = "https://en.wikipedia.org/wiki/EURO_STOXX_50"
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            url = INDEX_URLS['Eurostoxx']
+            soup = self.registry.get_page(url)
             table = soup.find('table', {'id': 'constituents'})
             
             if not table:
@@ -194,6 +159,12 @@ class IndexDataFetcher:
                 st.error("Could not find Eurostoxx table")
                 return []
             
+            # Tickers have no exchange suffix, so find the column telling us where they list
+            header_cells = [c.get_text().strip().lower() for c in table.find('tr').find_all(['td', 'th'])]
+            hint_col = next((i for i, h in enumerate(header_cells) if 'listing' in h or 'exchange' in h), None)
+            if hint_col is None:
+                hint_col = next((i for i, h in enumerate(header_cells) if 'country' in h or 'registered' in h or 'headquarters' in h), None)
+            
             symbols = []
             rows = table.find_all('tr')[1:]
             
@@ -203,8 +174,9 @@ class IndexDataFetcher:
                     try:
                         symbol = cells[0].get_text().strip()
                         symbol = re.sub(r'[^\w.-]', '', symbol)
+                        hint = cells[hint_col].get_text().strip() if hint_col is not None and hint_col < len(cells) else None
                         if symbol:
-                            symbols.append(symbol)
+                            symbols.append(to_yahoo_symbol(symbol, 'Eurostoxx', hint))
                     except:
                         continue
             
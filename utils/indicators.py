@@ -0,0 +1,299 @@
+import re
+import inspect
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from utils.cross_engine import prepare_closes, cumulative_sums, window_mean, exponential_mean, cross_signals
+from utils.rsi_engine import wilder_rsi
+
+# Indicator name -> function(frame, *params) returning a dates × symbols array
+INDICATORS = {}
+
+
+def indicator(name):
+    """Register a batched indicator; its parameters are parsed from the name, e.g. 'sma_50'"""
+    def decorator(fn):
+        INDICATORS[name] = fn
+        return fn
+    return decorator
+
+
+class IndicatorFrame:
+    """
+    Lazily computed, memoized indicators over a dates × symbols bar matrix.
+    
+    Indicators are requested by name ('sma_50', 'ema_12', 'macd', 'atr_14',
+    ...) and computed at most once per frame. Indicators built from others
+    (MACD from its EMAs, Bollinger bands from the 20-day average) go through
+    the same cache, so shared intermediates are computed once as well.
+    """
+    
+    def __init__(self, closes, highs=None, lows=None, volumes=None):
+        self.closes = prepare_closes(closes)
+        self.dates = self.closes.index
+        self.symbols = self.closes.columns
+        self.close = self.closes.to_numpy()
+        self.high = self._align(highs)
+        self.low = self._align(lows)
+        self.volume = self._align(volumes)
+        self._cache = {}
+        self.computed = []
+    
+    def _align(self, frame):
+        if frame is None:
+            return None
+        return frame.reindex(index=self.dates, columns=self.symbols).astype(float).to_numpy()
+    
+    def get(self, name):
+        """Values of an indicator as a dates × symbols array"""
+        if name not in self._cache:
+            base, params = _parse_name(name)
+            if base not in INDICATORS:
+                raise KeyError(f"Unknown indicator: {name}")
+            
+            # 'macd' and 'macd_12_26' are the same series, so cache under the full name
+            fn = INDICATORS[base]
+            defaults = [p.default for p in list(inspect.signature(fn).parameters.values())[1:]]
+            params = params + [d for d in defaults[len(params):] if d is not inspect.Parameter.empty]
+            canonical = '_'.join([base] + [str(p) for p in params])
+            
+            if canonical not in self._cache:
+                self._cache[canonical] = fn(self, *params)
+                self.computed.append(canonical)
+            self._cache[name] = self._cache[canonical]
+        return self._cache[name]
+    
+    def latest(self, names):
+        """Latest value of each indicator per symbol, as a DataFrame indexed by symbol"""
+        return pd.DataFrame({name: self.get(name)[-1] for name in names}, index=self.symbols)
+    
+    def sums(self):
+        """Prefix sums of closes shared by every simple average"""
+        if '_sums' not in self._cache:
+            self._cache['_sums'] = cumulative_sums(self.close)
+        return self._cache['_sums']
+
+
+def _parse_name(name):
+    match = re.fullmatch(r'([a-z0-9_]+?)((?:_\d+)*)', name)
+    base, params = match.group(1), match.group(2)
+    return base, [int(p) for p in params.split('_') if p]
+
+
+@indicator('close')
+def _close(frame):
+    return frame.close
+
+
+@indicator('sma')
+def _sma(frame, window):
+    csum, ccount = frame.sums()
+    return window_mean(csum, ccount, window)
+
+
+@indicator('ema')
+def _ema(frame, window):
+    return exponential_mean(frame.close, window)
+
+
+@indicator('rsi')
+def _rsi(frame, period=14):
+    return wilder_rsi(frame.closes, period)[0].to_numpy()
+
+
+@indicator('macd')
+def _macd(frame, fast=12, slow=26):
+    return frame.get(f"ema_{fast}") - frame.get(f"ema_{slow}")
+
+
+@indicator('macd_signal')
+def _macd_signal(frame, fast=12, slow=26, signal=9):
+    return exponential_mean(frame.get(f"macd_{fast}_{slow}"), signal)
+
+
+@indicator('macd_hist')
+def _macd_hist(frame, fast=12, slow=26, signal=9):
+    return frame.get(f"macd_{fast}_{slow}") - frame.get(f"macd_signal_{fast}_{slow}_{signal}")
+
+
+@indicator('stdev')
+def _stdev(frame, window):
+    # Rolling variance from prefix sums of values and squares
+    csum, ccount = frame.sums()
+    csq, _ = cumulative_sums(frame.close ** 2)
+    mean = window_mean(csum, ccount, window)
+    mean_sq = window_mean(csq, ccount, window)
+    return np.sqrt(np.maximum(mean_sq - mean ** 2, 0) * window / (window - 1))
+
+
+@indicator('bb_upper')
+def _bb_upper(frame, window=20, width=2):
+    return frame.get(f"sma_{window}") + width * frame.get(f"stdev_{window}")
+
+
+@indicator('bb_lower')
+def _bb_lower(frame, window=20, width=2):
+    return frame.get(f"sma_{window}") - width * frame.get(f"stdev_{window}")
+
+
+@indicator('bb_pct_b')
+def _bb_pct_b(frame, window=20, width=2):
+    """Position of the close within the bands: 0 at the lower band, 1 at the upper"""
+    lower = frame.get(f"bb_lower_{window}_{width}")
+    upper = frame.get(f"bb_upper_{window}_{width}")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (frame.close - lower) / (upper - lower)
+
+
+@indicator('true_range')
+def _true_range(frame):
+    if frame.high is None or frame.low is None:
+        raise ValueError("True range needs high and low prices")
+    prev_close = np.vstack([np.full((1, frame.close.shape[1]), np.nan), frame.close[:-1]])
+    # fmax skips the NaN gaps of the first bar, where there is no previous close
+    return np.fmax(frame.high - frame.low, np.fmax(np.abs(frame.high - prev_close), np.abs(frame.low - prev_close)))
+
+
+@indicator('atr')
+def _atr(frame, period=14):
+    # Wilder smoothing, i.e. an EMA with alpha = 1 / period
+    true_range = frame.get('true_range')
+    return pd.DataFrame(true_range).ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+
+
+@indicator('atr_pct')
+def _atr_pct(frame, period=14):
+    return frame.get(f"atr_{period}") / frame.close * 100
+
+
+@indicator('roc')
+def _roc(frame, window):
+    out = np.full(frame.close.shape, np.nan)
+    out[window:] = (frame.close[window:] / frame.close[:-window] - 1) * 100
+    return out
+
+
+@indicator('high_52w')
+def _high_52w(frame, window=252):
+    highs = frame.high if frame.high is not None else frame.close
+    return pd.DataFrame(highs).rolling(window, min_periods=1).max().to_numpy()
+
+
+@indicator('high_52w_distance')
+def _high_52w_distance(frame, window=252):
+    """Percent below the 52-week high (0 at a new high)"""
+    return (frame.close / frame.get(f"high_52w_{window}") - 1) * 100
+
+
+class Scanner(ABC):
+    """
+    A screen over an IndicatorFrame that declares the indicators it reads.
+    
+    Subclasses set `name` and `indicators` and implement `matches`, which
+    returns a boolean array per symbol and a signal label per symbol.
+    """
+    
+    name = ''
+    indicators = ()
+    
+    @abstractmethod
+    def matches(self, frame):
+        """Tuple of (boolean array of matching symbols, array of signal labels)"""
+
+
+class MacdCrossScanner(Scanner):
+    """MACD line crossed its signal line within the last few bars"""
+    
+    name = 'MACD Cross'
+    indicators = ('macd', 'macd_signal', 'macd_hist')
+    
+    def __init__(self, bars=5):
+        self.bars = bars
+    
+    def matches(self, frame):
+        signal, cross = cross_signals(frame.get('macd'), frame.get('macd_signal'))
+        recent = cross[-self.bars:]
+        crossed = (recent != 0).any(axis=0)
+        last = np.where(crossed, recent[::-1][np.argmax(recent[::-1] != 0, axis=0), np.arange(recent.shape[1])], 0)
+        return crossed, np.where(last > 0, 'MACD Bullish Cross', 'MACD Bearish Cross')
+
+
+class BollingerBreakoutScanner(Scanner):
+    """Close outside the 20-day, 2-standard-deviation Bollinger bands"""
+    
+    name = 'Bollinger Breakout'
+    indicators = ('bb_upper', 'bb_lower', 'bb_pct_b')
+    
+    def matches(self, frame):
+        pct_b = frame.get('bb_pct_b')[-1]
+        return (pct_b > 1) | (pct_b < 0), np.where(pct_b > 1, 'Above Upper Band', 'Below Lower Band')
+
+
+class NearHighScanner(Scanner):
+    """Close within a few percent of the 52-week high"""
+    
+    name = 'Near 52-Week High'
+    indicators = ('high_52w_distance', 'roc_20')
+    
+    def __init__(self, within_pct=2.0):
+        self.within_pct = within_pct
+    
+    def matches(self, frame):
+        distance = frame.get('high_52w_distance')[-1]
+        return distance >= -self.within_pct, np.where(distance >= 0, 'New 52-Week High', 'Near 52-Week High')
+
+
+class MomentumScanner(Scanner):
+    """20-day rate of change beyond a threshold, in either direction"""
+    
+    name = 'Strong Momentum'
+    indicators = ('roc_20', 'atr_pct')
+    
+    def __init__(self, threshold_pct=10.0):
+        self.threshold_pct = threshold_pct
+    
+    def matches(self, frame):
+        roc = frame.get('roc_20')[-1]
+        return np.abs(roc) >= self.threshold_pct, np.where(roc > 0, 'Strong Upside Momentum', 'Strong Downside Momentum')
+
+
+SCANNERS = {scanner.name: scanner for scanner in (
+    MacdCrossScanner(),
+    BollingerBreakoutScanner(),
+    NearHighScanner(),
+    MomentumScanner(),
+)}
+
+
+def run_scanners(frame, scanners):
+    """
+    Run several scanners over one IndicatorFrame
+    
+    The union of the indicators the scanners declare is computed first, once
+    each, and every scanner then reads from the shared cache.
+    
+    Returns:
+        DataFrame with one row per symbol and matching scanner: Symbol, Scanner,
+        Signal, Close and the latest value of every declared indicator
+    """
+    needed = list(dict.fromkeys(name for scanner in scanners for name in scanner.indicators))
+    latest = frame.latest(needed)
+    
+    frames = []
+    for scanner in scanners:
+        matched, labels = scanner.matches(frame)
+        matched = np.asarray(matched) & ~np.isnan(frame.close[-1])
+        if not matched.any():
+            continue
+        hits = latest[matched].copy()
+        hits.insert(0, 'Close', frame.close[-1][matched])
+        hits.insert(0, 'Signal', np.asarray(labels)[matched])
+        hits.insert(0, 'Scanner', scanner.name)
+        hits.index.name = 'Symbol'
+        frames.append(hits.reset_index())
+    
+    if not frames:
+        return pd.DataFrame(columns=['Symbol', 'Scanner', 'Signal', 'Close'] + needed)
+    return pd.concat(frames, ignore_index=True)
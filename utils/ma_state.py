@@ -0,0 +1,173 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_paths import cache_path
+from utils.cross_engine import last_crosses, prepare_closes
+from utils.state_store import PickleStateStore
+from utils.compute_pool import get_compute_backend, CHUNK_MIN_SYMBOLS_PER_WORKER
+
+
+class MovingAverageState:
+    """
+    Running state of a short/long simple moving-average pair for one symbol.
+    
+    Keeps the last `long_window` closes in a ring buffer plus running sums for
+    both windows, so each new bar updates the averages, signal and last cross
+    in constant time.
+    """
+    
+    def __init__(self, short_window, long_window, closes, last_date, last_cross_date=None, last_cross_type=None):
+        self.short_window = short_window
+        self.long_window = long_window
+        self.buffer = np.asarray(closes[-long_window:], dtype=float).copy()
+        self.pos = 0  # Index of the oldest close in the buffer
+        self.last_date = pd.Timestamp(last_date)
+        self.last_cross_date = last_cross_date
+        self.last_cross_type = last_cross_type
+        self._resum()
+        self.signal = self._signal()
+    
+    def _resum(self):
+        # Recompute the sums exactly, discarding accumulated rounding error
+        ordered = np.roll(self.buffer, -self.pos)
+        self.long_sum = ordered.sum()
+        self.short_sum = ordered[-self.short_window:].sum()
+    
+    def _signal(self):
+        return 1 if self.ma_short > self.ma_long else -1
+    
+    @property
+    def ma_short(self):
+        return self.short_sum / self.short_window
+    
+    @property
+    def ma_long(self):
+        return self.long_sum / self.long_window
+    
+    @property
+    def last_close(self):
+        return self.buffer[(self.pos - 1) % self.long_window]
+    
+    def update(self, date, close):
+        """Add one new daily close, updating averages, signal and last cross in O(1)"""
+        leaving_long = self.buffer[self.pos]
+        leaving_short = self.buffer[(self.pos + self.long_window - self.short_window) % self.long_window]
+        
+        self.long_sum += close - leaving_long
+        self.short_sum += close - leaving_short
+        self.buffer[self.pos] = close
+        self.pos = (self.pos + 1) % self.long_window
+        if self.pos == 0:
+            self._resum()
+        
+        signal = self._signal()
+        if signal != self.signal:
+            self.last_cross_date = pd.Timestamp(date)
+            self.last_cross_type = 'Golden Cross' if signal == 1 else 'Death Cross'
+        self.signal = signal
+        self.last_date = pd.Timestamp(date)
+    
+    def advance(self, closes):
+        """
+        Apply the bars in `closes` that arrived after the last processed date
+        
+        Returns:
+            False if the state no longer matches the stored history (the last
+            processed bar is missing or was re-adjusted) and must be reseeded
+        """
+        if self.last_date not in closes.index:
+            return False
+        
+        stored_close = closes.loc[self.last_date]
+        if not np.isclose(stored_close, self.last_close, rtol=1e-6):
+            return False
+        
+        for date, close in closes[closes.index > self.last_date].items():
+            self.update(date, close)
+        
+        return True
+
+
+class MovingAverageStateStore(PickleStateStore):
+    """Persists MovingAverageState objects for one window pair, keyed by symbol"""
+    
+    def __init__(self, short_window, long_window, path=None):
+        super().__init__(path or cache_path('ma_state', f"sma_{short_window}_{long_window}.pkl"))
+        self.short_window = short_window
+        self.long_window = long_window
+    
+    def seed(self, closes):
+        """
+        Build fresh states from full close histories in one vectorized pass
+        
+        Args:
+            closes: DataFrame of closes, indexed by date with one column per symbol
+        
+        Returns:
+            Dict of symbol -> MovingAverageState for symbols with enough history
+        """
+        if closes.empty:
+            return {}
+        
+        closes = prepare_closes(closes)
+        # Seeding runs one scan chunk at a time, so shard at the chunk threshold
+        crosses = get_compute_backend().run(
+            last_crosses, closes, min_symbols_per_worker=CHUNK_MIN_SYMBOLS_PER_WORKER,
+            short_window=self.short_window, long_window=self.long_window
+        )
+        
+        states = {}
+        for symbol in closes.columns:
+            series = closes[symbol].dropna()
+            if len(series) < self.long_window:
+                continue
+            
+            cross = crosses.loc[symbol]
+            states[symbol] = MovingAverageState(
+                self.short_window,
+                self.long_window,
+                series.to_numpy(),
+                series.index[-1],
+                cross['Last_Cross_Date'] if pd.notna(cross['Last_Cross_Date']) else None,
+                cross['Last_Cross_Type'] if pd.notna(cross['Last_Cross_Date']) else None
+            )
+        
+        return states
+    
+    def update(self, closes, states=None):
+        """
+        Bring stored states up to date with `closes`, seeding symbols without a usable state
+        
+        A scan passes the dict from load() for every chunk and saves it once at
+        the end with merge(); without it the stored states are loaded and saved
+        around this call.
+        
+        Returns:
+            Dict of symbol -> MovingAverageState for every symbol in `closes` with enough history
+        """
+        standalone = states is None
+        if standalone:
+            states = self.load()
+        prepared = prepare_closes(closes)
+        
+        current = {}
+        to_seed = []
+        for symbol in prepared.columns:
+            state = states.get(symbol)
+            if state is not None and state.advance(prepared[symbol].dropna()):
+                current[symbol] = state
+            else:
+                to_seed.append(symbol)
+        
+        current.update(self.seed(closes[to_seed]))
+        
+        states.update(current)
+        if standalone:
+            try:
+                self.merge(current)
+            except Exception as e:
+                logging.warning(f"Could not store moving-average state: {e}")
+        
+        return current
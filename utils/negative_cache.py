@@ -0,0 +1,69 @@
+import time
+import sqlite3
+from contextlib import contextmanager
+
+from utils.cache_paths import cache_path
+
+DAY = 24 * 60 * 60
+
+
+class NegativeCache:
+    """
+    Persistent record of symbols Yahoo Finance returned no data for.
+    
+    Known-bad symbols are skipped until their entry expires, so a delisted or
+    mistyped ticker costs one request per expiry period rather than one per
+    scan.
+    """
+    
+    def __init__(self, path=None, ttl=3 * DAY):
+        self.path = path or cache_path('negative_cache.sqlite')
+        self.ttl = ttl
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS failed_symbols (
+                    symbol TEXT PRIMARY KEY,
+                    reason TEXT,
+                    failed_at REAL NOT NULL
+                )
+            ''')
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+    
+    def known_bad(self, symbols):
+        """Return the subset of symbols with an unexpired failure entry"""
+        symbols = list(symbols)
+        if not symbols:
+            return set()
+        
+        cutoff = time.time() - self.ttl
+        bad = set()
+        with self._connect() as conn:
+            for start in range(0, len(symbols), 500):
+                chunk = symbols[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT symbol FROM failed_symbols WHERE failed_at >= ? "
+                    f"AND symbol IN ({','.join('?' * len(chunk))})",
+                    [cutoff] + chunk
+                ).fetchall()
+                bad.update(row[0] for row in rows)
+        
+        return bad
+    
+    def mark_bad(self, symbols, reason=''):
+        """Record symbols that returned no data"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO failed_symbols (symbol, reason, failed_at) VALUES (?, ?, ?)',
+                [(symbol, reason, now) for symbol in symbols]
+            )
@@ -0,0 +1,236 @@
+import os
+import re
+import logging
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cache_paths import cache_path, atomic_write
+from utils.negative_cache import NegativeCache
+from utils.providers import get_provider
+
+
+class PriceStore:
+    """
+    Disk-backed store of daily OHLCV bars, one Parquet file per symbol.
+
+    Each file remembers the earliest date it covers and the latest end date it
+    was checked against, so repeat requests only download the bars missing
+    since the last stored date. Bars are adjusted for splits and dividends; if
+    the overlapping bar of a tail download no longer matches what is stored
+    (a new dividend or split re-adjusted the history), the symbol is refetched
+    in full. Only completed sessions are stored and served: today's bar is
+    still moving while the market is open, so it is left out until tomorrow.
+    """
+    
+    COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+    
+    def __init__(self, root=None):
+        self.root = root or os.path.dirname(cache_path('prices', 'placeholder'))
+        os.makedirs(self.root, exist_ok=True)
+        self.negative_cache = NegativeCache()
+    
+    def _path(self, symbol):
+        safe_symbol = re.sub(r'[^\w.-]', '_', symbol)
+        return os.path.join(self.root, f"{safe_symbol}.parquet")
+    
+    def load(self, symbol):
+        """
+        Load stored bars for a symbol
+        
+        Returns:
+            Tuple of (DataFrame of bars, metadata dict with covered_from/checked_until)
+        """
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=self.COLUMNS), {}
+        
+        try:
+            table = pq.read_table(path)
+            meta = table.schema.metadata or {}
+            bars = table.to_pandas()
+            metadata = {
+                key: pd.Timestamp(meta[key.encode()].decode())
+                for key in ('covered_from', 'checked_until')
+                if key.encode() in meta
+            }
+            return bars, metadata
+        except Exception as e:
+            logging.warning(f"Could not read stored prices for {symbol}: {e}")
+            return pd.DataFrame(columns=self.COLUMNS), {}
+    
+    def save(self, symbol, bars, covered_from, checked_until):
+        """Write bars for a symbol, replacing the stored file atomically"""
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        table = pa.Table.from_pandas(bars)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'covered_from'] = pd.Timestamp(covered_from).isoformat().encode()
+        metadata[b'checked_until'] = pd.Timestamp(checked_until).isoformat().encode()
+        table = table.replace_schema_metadata(metadata)
+        
+        atomic_write(self._path(symbol), lambda tmp_path: pq.write_table(table, tmp_path))
+    
+    def get_history(self, symbol, start_date, end_date):
+        """Get daily bars for one symbol, downloading only what is missing"""
+        return self.get_many([symbol], start_date, end_date).get(symbol, pd.DataFrame(columns=self.COLUMNS))
+    
+    def get_many(self, symbols, start_date, end_date):
+        """
+        Get daily bars for several symbols, downloading only what is missing
+        
+        Symbols that need the same download window are fetched together in a
+        single multi-ticker request. Symbols in the negative cache are skipped,
+        and symbols that return nothing are added to it.
+        
+        Args:
+            symbols: List of stock symbols
+            start_date: First date required
+            end_date: Last date required (exclusive, as in yfinance)
+        
+        Returns:
+            Dict of symbol -> DataFrame of OHLCV bars between start_date and end_date,
+            up to the last completed session; symbols with no data (including
+            known-bad symbols) are omitted
+        """
+        start = pd.Timestamp(start_date).tz_localize(None).normalize()
+        # Today's bar is incomplete: storing it would make tomorrow's overlap check fail
+        session_start = pd.Timestamp(datetime.now()).normalize()
+        end = min(pd.Timestamp(end_date).tz_localize(None), session_start)
+        
+        known_bad = self.negative_cache.known_bad(symbols)
+        symbols = [symbol for symbol in symbols if symbol not in known_bad]
+        
+        stored = {}
+        fetch_groups = {}
+        for symbol in symbols:
+            bars, metadata = self.load(symbol)
+            stored[symbol] = (bars, metadata)
+            
+            covered_from = metadata.get('covered_from')
+            checked_until = metadata.get('checked_until')
+            
+            if bars.empty or covered_from is None or checked_until is None:
+                window = (start, end)
+            elif covered_from > start and checked_until < end:
+                window = (start, end)
+            elif covered_from > start:
+                # Backfill the head, overlapping the first stored bar
+                window = (start, bars.index.min())
+            elif checked_until < end:
+                # Append the tail, overlapping the last stored bar
+                window = (bars.index.max(), end)
+            else:
+                continue
+            
+            fetch_groups.setdefault(window, []).append(symbol)
+        
+        refetch = []
+        for (fetch_start, fetch_end), group in fetch_groups.items():
+            downloaded = self._download(group, fetch_start, fetch_end)
+            if downloaded is None:
+                continue
+            
+            # When nothing in a multi-symbol request came back the request itself
+            # probably failed (e.g. rate limiting), so nobody is blamed for it
+            failed = [symbol for symbol in group if symbol not in downloaded and stored[symbol][0].empty]
+            if failed and downloaded:
+                self.negative_cache.mark_bad(failed, reason='no price history')
+            
+            for symbol in group:
+                new_bars = downloaded.get(symbol)
+                if new_bars is not None:
+                    new_bars = new_bars[new_bars.index < session_start]
+                if new_bars is None or new_bars.empty:
+                    continue
+                
+                bars, metadata = stored[symbol]
+                if not bars.empty and not self._overlap_matches(bars, new_bars):
+                    refetch.append(symbol)
+                    continue
+                
+                merged = pd.concat([bars, new_bars]) if not bars.empty else new_bars
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                stored[symbol] = (merged, self._extend_metadata(metadata, start, end))
+                self._save_quietly(symbol, stored[symbol])
+        
+        if refetch:
+            logging.info(f"History re-adjusted for {len(refetch)} symbols, refetching in full")
+            windows = [self._extend_metadata(stored[symbol][1], start, end) for symbol in refetch]
+            refetch_start = min(window['covered_from'] for window in windows)
+            refetch_end = max(window['checked_until'] for window in windows)
+            downloaded = self._download(refetch, refetch_start, refetch_end) or {}
+            for symbol in refetch:
+                new_bars = downloaded.get(symbol)
+                if new_bars is not None:
+                    new_bars = new_bars[new_bars.index < session_start]
+                if new_bars is None or new_bars.empty:
+                    continue
+                stored[symbol] = (new_bars, {'covered_from': refetch_start, 'checked_until': refetch_end})
+                self._save_quietly(symbol, stored[symbol])
+        
+        return {
+            symbol: bars[(bars.index >= start) & (bars.index < min(pd.Timestamp(end_date).tz_localize(None), session_start))]
+            for symbol, (bars, _) in stored.items()
+            if not bars.empty
+        }
+    
+    def _extend_metadata(self, metadata, start, end):
+        return {
+            'covered_from': min(start, metadata.get('covered_from', start)),
+            'checked_until': max(end, metadata.get('checked_until', end))
+        }
+    
+    def _save_quietly(self, symbol, entry):
+        bars, metadata = entry
+        try:
+            self.save(symbol, bars, metadata['covered_from'], metadata['checked_until'])
+        except Exception as e:
+            logging.warning(f"Could not store prices for {symbol}: {e}")
+    
+    def _overlap_matches(self, bars, new_bars):
+        """Check that downloaded bars agree with stored bars on the dates they share"""
+        common = bars.index.intersection(new_bars.index)
+        if common.empty:
+            return True
+        
+        old_close = bars.loc[common, 'Close'].astype(float)
+        new_close = new_bars.loc[common, 'Close'].astype(float)
+        ratio = (new_close / old_close.where(old_close != 0)).dropna()
+        
+        return bool((ratio - 1).abs().max() < 1e-4) if not ratio.empty else True
+    
+    def _download(self, symbols, start, end):
+        """
+        Download adjusted OHLCV bars for several symbols in one request
+        
+        Returns:
+            Dict of symbol -> DataFrame for symbols that returned bars, or None if the request failed
+        """
+        try:
+            data = get_provider().download(symbols, start, end + pd.Timedelta(days=1))
+        except Exception as e:
+            logging.warning(f"Exception of type {type(e).__name__} occurred downloading {len(symbols)} symbols: {e}")
+            return None
+        
+        if data.empty:
+            return {}
+        
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        
+        result = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                bars = data[symbol]
+            else:
+                bars = data
+            
+            bars = bars.reindex(columns=self.COLUMNS).dropna(how='all')
+            if not bars.empty:
+                result[symbol] = bars
+        
+        return result
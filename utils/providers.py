@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+import pandas as pd
+import requests
+import yfinance as yf
+
+from utils.cache_paths import CACHE_DIR
+from utils.fetch_executor import get_rate_limiter
+
+# yf.download keeps per-call results in module-level state, so concurrent
+# calls from different threads can mix up each other's frames.
+_download_lock = threading.Lock()
+
+
+class DataProvider(ABC):
+    """
+    Source of all external data: daily price bars, fundamentals and HTML pages.
+    
+    Every analyzer reaches Yahoo Finance and Wikipedia through the active
+    provider (see get_provider), so scans can be recorded once and replayed
+    offline.
+    """
+    
+    @abstractmethod
+    def download(self, symbols, start, end):
+        """
+        Download adjusted daily OHLCV bars for several symbols
+        
+        Returns:
+            DataFrame with (symbol, field) column MultiIndex, as yf.download(group_by='ticker')
+        """
+    
+    @abstractmethod
+    def info(self, symbol):
+        """Get the ticker.info dict for a symbol"""
+    
+    @abstractmethod
+    def fast_info(self, symbol):
+        """Get the quick market cap and share count for a symbol as {'marketCap', 'shares'}"""
+    
+    @abstractmethod
+    def get_html(self, url, headers=None):
+        """Get the raw HTML of a page"""
+
+
+class YahooProvider(DataProvider):
+    """Live provider backed by yfinance and requests, behind the shared rate limiter"""
+    
+    def download(self, symbols, start, end):
+        get_rate_limiter().acquire()
+        with _download_lock:
+            return yf.download(
+                list(symbols),
+                start=start,
+                end=end,
+                auto_adjust=True,
+                group_by='ticker',
+                progress=False,
+                threads=True
+            )
+    
+    def info(self, symbol):
+        get_rate_limiter().acquire()
+        return yf.Ticker(symbol).info or {}
+    
+    def fast_info(self, symbol):
+        get_rate_limiter().acquire()
+        fast_info = yf.Ticker(symbol).fast_info
+        # fast_info is lazy; read the values here so the request happens on this thread
+        return {'marketCap': fast_info['marketCap'], 'shares': fast_info['shares']}
+    
+    def get_html(self, url, headers=None):
+        response = requests.get(url, headers=headers, timeout=15)
+        response.raise_for_status()
+        return response.content
+
+
+class _Recordings:
+    """On-disk layout shared by the recording and replay providers"""
+    
+    def __init__(self, root):
+        self.root = root
+        for folder in ('prices', 'info', 'fast_info', 'html'):
+            os.makedirs(os.path.join(root, folder), exist_ok=True)
+    
+    def _path(self, folder, key, extension):
+        safe_key = re.sub(r'[^\w.-]', '_', key)
+        return os.path.join(self.root, folder, f"{safe_key}.{extension}")
+    
+    def prices_path(self, symbol):
+        return self._path('prices', symbol, 'parquet')
+    
+    def info_path(self, folder, symbol):
+        return self._path(folder, symbol, 'json')
+    
+    def html_path(self, url):
+        return self._path('html', hashlib.sha1(url.encode()).hexdigest(), 'html')
+
+
+class RecordingProvider(DataProvider):
+    """
+    Provider that passes calls through to another provider and records every response.
+    
+    Price bars are merged per symbol, so a recording answers any date window
+    it has seen bars for, not just the exact calls that were made.
+    """
+    
+    def __init__(self, inner, root):
+        self.inner = inner
+        self.recordings = _Recordings(root)
+        self._lock = threading.Lock()
+    
+    def download(self, symbols, start, end):
+        data = self.inner.download(symbols, start, end)
+        if data.empty or not isinstance(data.columns, pd.MultiIndex):
+            return data
+        
+        with self._lock:
+            for symbol in data.columns.get_level_values(0).unique():
+                bars = data[symbol].dropna(how='all')
+                if bars.empty:
+                    continue
+                
+                path = self.recordings.prices_path(symbol)
+                if os.path.exists(path):
+                    bars = pd.concat([pd.read_parquet(path), bars])
+                    bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+                bars.to_parquet(path)
+        
+        return data
+    
+    def _record_json(self, folder, symbol, value):
+        with open(self.recordings.info_path(folder, symbol), 'w') as f:
+            json.dump(value, f, default=str)
+        return value
+    
+    def info(self, symbol):
+        return self._record_json('info', symbol, self.inner.info(symbol))
+    
+    def fast_info(self, symbol):
+        return self._record_json('fast_info', symbol, self.inner.fast_info(symbol))
+    
+    def get_html(self, url, headers=None):
+        content = self.inner.get_html(url, headers)
+        with open(self.recordings.html_path(url), 'wb') as f:
+            f.write(content)
+        return content
+
+
+class ReplayProvider(DataProvider):
+    """
+    Provider that serves recorded responses from disk with no network access.
+    
+    Symbols without recorded bars are left out of downloads, as Yahoo leaves
+    out symbols it has no data for; missing fundamentals or pages raise
+    LookupError.
+    """
+    
+    def __init__(self, root):
+        self.recordings = _Recordings(root)
+    
+    def download(self, symbols, start, end):
+        start = pd.Timestamp(start).tz_localize(None)
+        end = pd.Timestamp(end).tz_localize(None)
+        
+        frames = {}
+        for symbol in symbols:
+            path = self.recordings.prices_path(symbol)
+            if not os.path.exists(path):
+                continue
+            bars = pd.read_parquet(path)
+            bars = bars[(bars.index >= start) & (bars.index < end)]
+            if not bars.empty:
+                frames[symbol] = bars
+        
+        if not frames:
+            return pd.DataFrame()
+        
+        return pd.concat(frames, axis=1)
+    
+    def _replay_json(self, folder, symbol):
+        path = self.recordings.info_path(folder, symbol)
+        if not os.path.exists(path):
+            raise LookupError(f"No recorded {folder} for {symbol}")
+        with open(path) as f:
+            return json.load(f)
+    
+    def info(self, symbol):
+        return self._replay_json('info', symbol)
+    
+    def fast_info(self, symbol):
+        return self._replay_json('fast_info', symbol)
+    
+    def get_html(self, url, headers=None):
+        path = self.recordings.html_path(url)
+        if not os.path.exists(path):
+            raise LookupError(f"No recorded page for {url}")
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def _provider_from_environment():
+    """
+    Build the provider selected by TRADE_IDEAS_PROVIDER
+    
+    'live' (default) talks to Yahoo and Wikipedia, 'record' does the same and
+    saves every response under TRADE_IDEAS_RECORDINGS, and 'replay' serves
+    those recordings offline.
+    """
+    mode = os.environ.get('TRADE_IDEAS_PROVIDER', 'live').lower()
+    root = os.environ.get('TRADE_IDEAS_RECORDINGS', os.path.join(CACHE_DIR, 'recordings'))
+    
+    if mode == 'record':
+        return RecordingProvider(YahooProvider(), root)
+    if mode == 'replay':
+        return ReplayProvider(root)
+    if mode != 'live':
+        logging.warning(f"Unknown TRADE_IDEAS_PROVIDER '{mode}', using live data")
+    return YahooProvider()
+
+
+_provider = _provider_from_environment()
+
+
+def get_provider():
+    """Return the active data provider"""
+    return _provider
+
+
+def set_provider(provider):
+    """Replace the active data provider, e.g. with a ReplayProvider for benchmarks"""
+    global _provider
+    _provider = provider
@@ -0,0 +1,180 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_paths import cache_path
+from utils.cross_engine import prepare_closes
+from utils.state_store import PickleStateStore
+from utils.compute_pool import get_compute_backend, CHUNK_MIN_SYMBOLS_PER_WORKER
+
+
+def wilder_rsi(closes, period=14):
+    """
+    Wilder RSI for every symbol of a dates × symbols close matrix
+    
+    The first average gain/loss is the simple mean of the first `period`
+    changes; after that each is smoothed as (previous * (period - 1) + new) / period.
+    The recursion runs down the dates once, updating all symbols together.
+    
+    Args:
+        closes: DataFrame of closes, indexed by date with one column per symbol
+        period: RSI period (default 14)
+    
+    Returns:
+        Tuple of (RSI DataFrame shaped like closes, final average gains, final
+        average losses) with the averages as arrays per symbol (NaN if too short)
+    """
+    closes = prepare_closes(closes)
+    values = closes.to_numpy()
+    n_dates, n_symbols = values.shape
+    
+    delta = np.full(values.shape, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    valid = ~np.isnan(delta)
+    
+    avg_gain = np.full(n_symbols, np.nan)
+    avg_loss = np.full(n_symbols, np.nan)
+    gain_sum = np.zeros(n_symbols)
+    loss_sum = np.zeros(n_symbols)
+    count = np.zeros(n_symbols, dtype=int)
+    rsi = np.full(values.shape, np.nan)
+    
+    for t in range(1, n_dates):
+        ok = valid[t]
+        count += ok
+        
+        # Accumulate the seed window, then switch to Wilder smoothing
+        seeding = ok & (count <= period)
+        gain_sum[seeding] += gains[t, seeding]
+        loss_sum[seeding] += losses[t, seeding]
+        
+        seeded_now = ok & (count == period)
+        avg_gain[seeded_now] = gain_sum[seeded_now] / period
+        avg_loss[seeded_now] = loss_sum[seeded_now] / period
+        
+        smoothing = ok & (count > period)
+        avg_gain[smoothing] = (avg_gain[smoothing] * (period - 1) + gains[t, smoothing]) / period
+        avg_loss[smoothing] = (avg_loss[smoothing] * (period - 1) + losses[t, smoothing]) / period
+        
+        rsi[t] = _rsi_from_averages(avg_gain, avg_loss)
+    
+    return pd.DataFrame(rsi, index=closes.index, columns=closes.columns), avg_gain, avg_loss
+
+
+def wilder_averages(closes, period=14):
+    """Final Wilder average gain and loss per symbol, as a DataFrame indexed by symbol"""
+    _, avg_gain, avg_loss = wilder_rsi(closes, period)
+    return pd.DataFrame({'Avg_Gain': avg_gain, 'Avg_Loss': avg_loss}, index=closes.columns)
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    # No losses in the window means RSI 100 (or undefined if price never moved)
+    return np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, np.nan), rsi)
+
+
+class RsiState:
+    """Wilder-smoothed average gain and loss for one symbol, updated in O(1) per new bar"""
+    
+    def __init__(self, period, avg_gain, avg_loss, last_close, last_date):
+        self.period = period
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.last_close = last_close
+        self.last_date = pd.Timestamp(last_date)
+    
+    @property
+    def rsi(self):
+        return float(_rsi_from_averages(np.array([self.avg_gain]), np.array([self.avg_loss]))[0])
+    
+    def update(self, date, close):
+        change = close - self.last_close
+        self.avg_gain = (self.avg_gain * (self.period - 1) + max(change, 0.0)) / self.period
+        self.avg_loss = (self.avg_loss * (self.period - 1) + max(-change, 0.0)) / self.period
+        self.last_close = close
+        self.last_date = pd.Timestamp(date)
+    
+    def advance(self, closes):
+        """
+        Apply the bars in `closes` that arrived after the last processed date
+        
+        Returns:
+            False if the last processed bar is missing or was re-adjusted and the state must be reseeded
+        """
+        if self.last_date not in closes.index:
+            return False
+        if not np.isclose(closes.loc[self.last_date], self.last_close, rtol=1e-6):
+            return False
+        
+        for date, close in closes[closes.index > self.last_date].items():
+            self.update(date, close)
+        
+        return True
+
+
+class RsiStateStore(PickleStateStore):
+    """Persists RsiState objects for one RSI period, keyed by symbol"""
+    
+    def __init__(self, period=14, path=None):
+        super().__init__(path or cache_path('rsi_state', f"wilder_{period}.pkl"))
+        self.period = period
+    
+    def seed(self, closes):
+        """Build fresh states from full close histories in one batched pass"""
+        if closes.empty:
+            return {}
+        
+        prepared = prepare_closes(closes)
+        averages = get_compute_backend().run(
+            wilder_averages, prepared, min_symbols_per_worker=CHUNK_MIN_SYMBOLS_PER_WORKER, period=self.period
+        )
+        
+        states = {}
+        for symbol in prepared.columns:
+            series = prepared[symbol].dropna()
+            avg_gain, avg_loss = averages.loc[symbol, 'Avg_Gain'], averages.loc[symbol, 'Avg_Loss']
+            if np.isnan(avg_gain) or series.empty:
+                continue
+            states[symbol] = RsiState(self.period, avg_gain, avg_loss, series.iloc[-1], series.index[-1])
+        
+        return states
+    
+    def update(self, closes, states=None):
+        """
+        Bring stored states up to date with `closes`, seeding symbols without a usable state
+        
+        A scan passes the dict from load() for every chunk and saves it once at
+        the end with merge(); without it the stored states are loaded and saved
+        around this call.
+        
+        Returns:
+            Series of the latest RSI per symbol (symbols with too little history are omitted)
+        """
+        standalone = states is None
+        if standalone:
+            states = self.load()
+        prepared = prepare_closes(closes)
+        
+        current = {}
+        to_seed = []
+        for symbol in prepared.columns:
+            state = states.get(symbol)
+            if state is not None and state.advance(prepared[symbol].dropna()):
+                current[symbol] = state
+            else:
+                to_seed.append(symbol)
+        
+        current.update(self.seed(closes[to_seed]))
+        
+        states.update(current)
+        if standalone:
+            try:
+                self.merge(current)
+            except Exception as e:
+                logging.warning(f"Could not store RSI state: {e}")
+        
+        return pd.Series({symbol: state.rsi for symbol, state in current.items()}, dtype=float)
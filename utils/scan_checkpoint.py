@@ -0,0 +1,107 @@
+import json
+import time
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+from utils.cache_paths import cache_path
+
+DAY = 24 * 60 * 60
+
+
+def _to_json(value):
+    # numpy scalars and timestamps are not JSON serializable on their own
+    return json.dumps(value, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+
+class ScanCheckpoint:
+    """
+    Per-symbol results of one universe scan, persisted as they are produced.
+    
+    A scan is identified by its kind, the symbols scanned, its parameters and
+    the as-of date, so a Streamlit rerun or server restart halfway through a
+    scan resumes with the symbols it has not processed yet. Symbols that were
+    processed without producing a result are stored too (as None) so they are
+    not retried. Checkpoints older than `retention` are purged.
+    """
+    
+    def __init__(self, kind, symbols, params, as_of, path=None, retention=7 * DAY):
+        self.path = path or cache_path('scan_checkpoints.sqlite')
+        key = _to_json({
+            'kind': kind,
+            'symbols': sorted(symbols),
+            'params': params,
+            'as_of': str(as_of),
+        })
+        self.scan_id = hashlib.sha1(key.encode()).hexdigest()
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scans (
+                    scan_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    as_of TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    completed_at REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scan_results (
+                    scan_id TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    result TEXT,
+                    PRIMARY KEY (scan_id, symbol)
+                )
+            ''')
+            
+            cutoff = time.time() - retention
+            conn.execute('DELETE FROM scan_results WHERE scan_id IN (SELECT scan_id FROM scans WHERE created_at < ?)', (cutoff,))
+            conn.execute('DELETE FROM scans WHERE created_at < ?', (cutoff,))
+            conn.execute(
+                'INSERT OR IGNORE INTO scans (scan_id, kind, as_of, created_at) VALUES (?, ?, ?, ?)',
+                (self.scan_id, kind, str(as_of), time.time())
+            )
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+    
+    def load(self):
+        """
+        Results recorded so far
+        
+        Returns:
+            Dict of symbol -> result (None for symbols processed without a result)
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT symbol, result FROM scan_results WHERE scan_id = ?', (self.scan_id,)).fetchall()
+        
+        return {symbol: json.loads(result) if result is not None else None for symbol, result in rows}
+    
+    def record(self, results):
+        """Store results for processed symbols, given as {symbol: result or None}"""
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO scan_results (scan_id, symbol, result) VALUES (?, ?, ?)',
+                [
+                    (self.scan_id, symbol, _to_json(result) if result is not None else None)
+                    for symbol, result in results.items()
+                ]
+            )
+    
+    def complete(self):
+        """Mark the scan as finished"""
+        with self._connect() as conn:
+            conn.execute('UPDATE scans SET completed_at = ? WHERE scan_id = ?', (time.time(), self.scan_id))
+    
+    def is_complete(self):
+        with self._connect() as conn:
+            row = conn.execute('SELECT completed_at FROM scans WHERE scan_id = ?', (self.scan_id,)).fetchone()
+        
+        return row is not None and row[0] is not None
@@ -0,0 +1,226 @@
+import json
+import time
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+from utils.cache_paths import cache_path
+from utils.scan_checkpoint import _to_json
+
+STATUS_ORDER = ['New', 'Persisting', 'Expired']
+
+
+class ScanHistory:
+    """
+    Completed scan results kept per index, scan parameters and as-of date.
+    
+    Each completed scan stores its signal rows, so a scan can be compared with
+    the one before it. The latest inputs seen for each symbol (date and value
+    of its last close) are kept with the result they produced, so a rescan
+    can reuse that result for symbols without new bars instead of analyzing
+    them again.
+    """
+    
+    def __init__(self, path=None):
+        self.path = path or cache_path('scan_history.sqlite')
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scan_runs (
+                    index_name TEXT NOT NULL,
+                    params_key TEXT NOT NULL,
+                    as_of TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (index_name, params_key, as_of)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scan_signals (
+                    index_name TEXT NOT NULL,
+                    params_key TEXT NOT NULL,
+                    as_of TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (index_name, params_key, as_of, symbol)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scan_inputs (
+                    index_name TEXT NOT NULL,
+                    params_key TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    last_date TEXT NOT NULL,
+                    last_close REAL NOT NULL,
+                    result TEXT,
+                    PRIMARY KEY (index_name, params_key, symbol)
+                )
+            ''')
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def params_key(params):
+        return hashlib.sha1(_to_json(params).encode()).hexdigest()
+    
+    def record(self, index_name, params, as_of, rows):
+        """
+        Store the signal rows of a completed scan, replacing an earlier scan with the same as-of date
+        
+        Args:
+            index_name: Index that was scanned
+            params: Dict of scan parameters
+            as_of: Date the scan was run as of
+            rows: List of result row dicts, each with a 'Symbol'
+        """
+        key = self.params_key(params)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO scan_runs (index_name, params_key, as_of, params, created_at) VALUES (?, ?, ?, ?, ?)',
+                (index_name, key, str(as_of), _to_json(params), time.time())
+            )
+            conn.execute(
+                'DELETE FROM scan_signals WHERE index_name = ? AND params_key = ? AND as_of = ?',
+                (index_name, key, str(as_of))
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO scan_signals (index_name, params_key, as_of, symbol, result) VALUES (?, ?, ?, ?, ?)',
+                [(index_name, key, str(as_of), row['Symbol'], _to_json(row)) for row in rows]
+            )
+    
+    def scan_dates(self, index_name, params):
+        """As-of dates of the stored scans, most recent first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT as_of FROM scan_runs WHERE index_name = ? AND params_key = ? ORDER BY as_of DESC',
+                (index_name, self.params_key(params))
+            ).fetchall()
+        
+        return [as_of for (as_of,) in rows]
+    
+    def results(self, index_name, params, as_of):
+        """Signal rows of one stored scan as a DataFrame"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT result FROM scan_signals WHERE index_name = ? AND params_key = ? AND as_of = ?',
+                (index_name, self.params_key(params), str(as_of))
+            ).fetchall()
+        
+        return pd.DataFrame([json.loads(result) for (result,) in rows])
+    
+    def diff(self, index_name, params, as_of):
+        """
+        Compare a stored scan with the stored scan before it
+        
+        A signal is identified by symbol, cross type and cross date, so a
+        symbol that crossed back the other way shows as one new and one
+        expired signal.
+        
+        Returns:
+            Tuple of (DataFrame of signals with a Status column of New,
+            Persisting or Expired, as-of date of the previous scan). Expired
+            rows carry the values from the previous scan. The previous date is
+            None when there is no earlier scan, and every signal is then New.
+        """
+        earlier = [date for date in self.scan_dates(index_name, params) if date < str(as_of)]
+        previous_as_of = earlier[0] if earlier else None
+        
+        current = self.results(index_name, params, as_of)
+        previous = self.results(index_name, params, previous_as_of) if previous_as_of else pd.DataFrame()
+        
+        def keys(frame):
+            if frame.empty:
+                return pd.Series([], dtype=object)
+            return frame['Symbol'] + '|' + frame['Cross_Type'] + '|' + frame['Cross_Date']
+        
+        current_keys, previous_keys = keys(current), keys(previous)
+        frames = []
+        if not current.empty:
+            current = current.assign(Status=['Persisting' if key in set(previous_keys) else 'New' for key in current_keys])
+            frames.append(current)
+        if not previous.empty:
+            expired = previous[~previous_keys.isin(set(current_keys))]
+            frames.append(expired.assign(Status='Expired'))
+        
+        if not frames:
+            return pd.DataFrame(), previous_as_of
+        
+        changes = pd.concat(frames, ignore_index=True)
+        changes['Status'] = pd.Categorical(changes['Status'], categories=STATUS_ORDER, ordered=True)
+        changes = changes.sort_values(['Status', 'Cross_Date', 'Symbol'], ascending=[True, False, True])
+        changes['Status'] = changes['Status'].astype(str)
+        return changes[['Status'] + [c for c in changes.columns if c != 'Status']], previous_as_of
+    
+    def unchanged(self, index_name, params, inputs):
+        """
+        Stored results for symbols whose inputs match those of their last scan
+        
+        Args:
+            index_name: Index being scanned
+            params: Dict of scan parameters
+            inputs: Dict of symbol -> (last bar date, last close)
+        
+        Returns:
+            Dict of symbol -> stored result row (None for symbols that had no signal)
+        """
+        if not inputs:
+            return {}
+        
+        key = self.params_key(params)
+        symbols = list(inputs)
+        stored = {}
+        with self._connect() as conn:
+            # Stay under SQLite's bound-parameter limit on large universes
+            for start in range(0, len(symbols), 500):
+                batch = symbols[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                stored.update(
+                    (symbol, (last_date, last_close, result))
+                    for symbol, last_date, last_close, result in conn.execute(
+                        f'SELECT symbol, last_date, last_close, result FROM scan_inputs '
+                        f'WHERE index_name = ? AND params_key = ? AND symbol IN ({placeholders})',
+                        [index_name, key] + batch
+                    )
+                )
+        
+        matches = {}
+        for symbol, (last_date, last_close, result) in stored.items():
+            date, close = inputs[symbol]
+            if last_date == str(pd.Timestamp(date).date()) and abs(last_close - close) <= 1e-6 * abs(close):
+                matches[symbol] = json.loads(result) if result is not None else None
+        
+        return matches
+    
+    def remember_inputs(self, index_name, params, inputs, results):
+        """
+        Store the inputs each symbol was analyzed with and the result it produced
+        
+        Args:
+            index_name: Index being scanned
+            params: Dict of scan parameters
+            inputs: Dict of symbol -> (last bar date, last close)
+            results: Dict of symbol -> result row or None
+        """
+        key = self.params_key(params)
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO scan_inputs (index_name, params_key, symbol, last_date, last_close, result) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        index_name, key, symbol, str(pd.Timestamp(date).date()), float(close),
+                        _to_json(results[symbol]) if results.get(symbol) is not None else None
+                    )
+                    for symbol, (date, close) in inputs.items()
+                ]
+            )
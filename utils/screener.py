@@ -0,0 +1,291 @@
+import os
+import re
+import logging
+import operator
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.breadth import BreadthEngine
+from utils.cache_paths import cache_path, atomic_write
+from utils.cross_engine import last_crosses
+from utils.indicators import IndicatorFrame
+
+# Indicator columns of the snapshot, named as in the indicator registry
+SNAPSHOT_INDICATORS = [
+    'sma_20', 'sma_50', 'sma_200', 'ema_12', 'ema_26', 'rsi_14',
+    'macd', 'macd_signal', 'macd_hist', 'bb_pct_b', 'roc_20', 'high_52w_distance',
+]
+
+# Friendlier names accepted in expressions
+ALIASES = {
+    'rsi': 'rsi_14',
+    'price': 'close',
+    'pe': 'pe_ratio',
+    'fwd_pe': 'forward_pe',
+    'market_cap': 'market_cap_b',
+}
+
+
+class ScreenerError(ValueError):
+    """Raised for an expression that cannot be parsed or refers to an unknown field"""
+
+
+class ScreenerSnapshot:
+    """
+    Latest indicator values, cross state and fundamentals per symbol for one index.
+    
+    Built from the stored universe close matrix and the fundamentals cache,
+    kept as one Parquet file per index and rebuilt at most once a day, so
+    screens over it never touch the network.
+    """
+    
+    def __init__(self, index_name):
+        self.index_name = index_name
+        self.path = cache_path('snapshots', f"{index_name.replace(' ', '_').replace('&', 'and')}.parquet")
+        self.breadth = BreadthEngine()
+        self.fundamentals = self.breadth.fundamentals
+        self.executor = self.breadth.executor
+    
+    def load(self, symbols):
+        """Snapshot for the index's symbols, rebuilt if it was not built today"""
+        if os.path.exists(self.path) and datetime.fromtimestamp(os.path.getmtime(self.path)).date() == datetime.now().date():
+            try:
+                cached = pd.read_parquet(self.path)
+                if set(symbols) <= set(cached.index) | self.breadth.store.negative_cache.known_bad(symbols):
+                    return cached.loc[[s for s in symbols if s in cached.index]]
+            except Exception as e:
+                logging.warning(f"Could not read screener snapshot for {self.index_name}: {e}")
+        
+        snapshot = self.build(symbols)
+        try:
+            atomic_write(self.path, snapshot.to_parquet)
+        except Exception as e:
+            logging.warning(f"Could not store screener snapshot for {self.index_name}: {e}")
+        
+        return snapshot
+    
+    def build(self, symbols):
+        closes = self.breadth.load_matrix(self.index_name, symbols)
+        if closes.empty:
+            return pd.DataFrame()
+        
+        frame = IndicatorFrame(closes)
+        snapshot = frame.latest(SNAPSHOT_INDICATORS)
+        snapshot.insert(0, 'close', frame.close[-1])
+        snapshot['spread_pct'] = (snapshot['sma_50'] - snapshot['sma_200']) / snapshot['sma_200'] * 100
+        
+        crosses = last_crosses(closes, 50, 200)
+        one_week_ago = pd.Timestamp(datetime.now() - timedelta(days=7))
+        recent = crosses['Last_Cross_Date'] >= one_week_ago
+        snapshot['golden_cross'] = (recent & (crosses['Last_Cross_Type'] == 'Golden Cross')).to_numpy()
+        snapshot['death_cross'] = (recent & (crosses['Last_Cross_Type'] == 'Death Cross')).to_numpy()
+        snapshot['days_since_cross'] = (pd.Timestamp(closes.index[-1]) - crosses['Last_Cross_Date']).dt.days.to_numpy()
+        
+        fields = ['longName', 'forwardPE', 'trailingPE', 'marketCap']
+        infos = dict(self.fundamentals.iter_info(list(snapshot.index), fields, self.executor))
+        sectors = self.breadth.get_sectors(self.index_name, list(snapshot.index))
+        snapshot['company'] = [infos.get(s, {}).get('longName') or s for s in snapshot.index]
+        snapshot['sector'] = [sectors.get(s) for s in snapshot.index]
+        # Non-numeric values (Yahoo sends e.g. 'Infinity') become NaN, which no comparison matches
+        for column, field, scale in [('forward_pe', 'forwardPE', 1), ('pe_ratio', 'trailingPE', 1), ('market_cap_b', 'marketCap', 1e9)]:
+            values = pd.to_numeric(pd.Series([infos.get(s, {}).get(field) for s in snapshot.index], dtype=object), errors='coerce')
+            snapshot[column] = values.where(np.isfinite(values)).to_numpy() / scale
+        
+        snapshot.index.name = 'symbol'
+        return snapshot
+
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?) |
+        (?P<string>"[^"]*"|'[^']*') |
+        (?P<op><=|>=|!=|==|<|>|=|\(|\)|\+|-|\*|/) |
+        (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )''', re.VERBOSE)
+
+_COMPARISONS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+_ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ScreenerError(f"Unexpected character at position {pos + 1}: {expression[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.upper() in ('AND', 'OR', 'NOT', 'TRUE', 'FALSE'):
+            kind, value = 'keyword', value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser turning an expression into a function of the snapshot
+    
+    Grammar:
+        expr       := term (OR term)*
+        term       := factor (AND factor)*
+        factor     := NOT factor | '(' expr ')' | comparison | field
+        comparison := value (< | <= | > | >= | = | != ) value
+        value      := product ((+ | -) product)*
+        product    := operand ((* | /) operand)*
+        operand    := number | "string" | field | '(' value ')' | - operand
+    """
+    
+    def __init__(self, tokens, columns):
+        self.tokens = tokens
+        self.pos = 0
+        self.columns = columns
+    
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+    
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            expected = f"'{value}'" if value else 'more input'
+            raise ScreenerError(f"Expected {expected} but found {token[1] or 'end of expression'!r}")
+        self.pos += 1
+        return token
+    
+    def parse(self):
+        node = self.expr()
+        if self.peek()[0] is not None:
+            raise ScreenerError(f"Unexpected {self.peek()[1]!r}")
+        return node
+    
+    def expr(self):
+        node = self.term()
+        while self.peek() == ('keyword', 'OR'):
+            self.take()
+            left, right = node, self.term()
+            node = lambda df, left=left, right=right: _mask(left(df)) | _mask(right(df))
+        return node
+    
+    def term(self):
+        node = self.factor()
+        while self.peek() == ('keyword', 'AND'):
+            self.take()
+            left, right = node, self.factor()
+            node = lambda df, left=left, right=right: _mask(left(df)) & _mask(right(df))
+        return node
+    
+    def factor(self):
+        if self.peek() == ('keyword', 'NOT'):
+            self.take()
+            inner = self.factor()
+            return lambda df: ~_mask(inner(df))
+        
+        # A parenthesis may open a boolean group or an arithmetic value; try the group first
+        if self.peek() == ('op', '('):
+            start = self.pos
+            self.take()
+            node = self.expr()
+            if self.peek()[0] is None:
+                raise ScreenerError("Expected ')' but found 'end of expression'")
+            if self.peek() == ('op', ')'):
+                self.take()
+                if self.peek()[1] not in _COMPARISONS and self.peek()[1] not in _ARITHMETIC:
+                    return node
+            self.pos = start
+        
+        left = self.value()
+        if self.peek()[1] in _COMPARISONS:
+            compare = _COMPARISONS[self.take()[1]]
+            right = self.value()
+            return lambda df: compare(left(df), right(df))
+        return left
+    
+    def value(self):
+        node = self.product()
+        while self.peek()[1] in ('+', '-'):
+            apply = _ARITHMETIC[self.take()[1]]
+            left, right = node, self.product()
+            node = lambda df, apply=apply, left=left, right=right: apply(left(df), right(df))
+        return node
+    
+    def product(self):
+        node = self.operand()
+        while self.peek()[1] in ('*', '/'):
+            apply = _ARITHMETIC[self.take()[1]]
+            left, right = node, self.operand()
+            node = lambda df, apply=apply, left=left, right=right: apply(left(df), right(df))
+        return node
+    
+    def operand(self):
+        kind, value = self.take()
+        if kind == 'number':
+            number = float(value)
+            return lambda df: number
+        if kind == 'string':
+            text = value[1:-1]
+            return lambda df: text
+        if kind == 'keyword' and value in ('TRUE', 'FALSE'):
+            flag = value == 'TRUE'
+            return lambda df: flag
+        if kind == 'name':
+            column = ALIASES.get(value.lower(), value.lower())
+            if column not in self.columns:
+                raise ScreenerError(f"Unknown field {value!r}")
+            return lambda df: df[column].to_numpy()
+        if value == '(':
+            node = self.value()
+            self.take(')')
+            return node
+        if value == '-':
+            inner = self.operand()
+            return lambda df: -inner(df)
+        raise ScreenerError(f"Unexpected {value!r}")
+
+
+def _mask(values):
+    values = np.asarray(values)
+    if values.dtype != bool:
+        # Bare numeric fields count as true when non-zero (NaN is false)
+        values = np.nan_to_num(values.astype(float), nan=0.0) != 0
+    return values
+
+
+def compile_expression(expression, columns):
+    """
+    Parse a screen such as "golden_cross AND rsi < 60 AND forward_pe < 20"
+    
+    Args:
+        expression: Filter expression
+        columns: Snapshot columns the expression may refer to
+    
+    Returns:
+        Function taking a snapshot DataFrame and returning a boolean mask array
+    """
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise ScreenerError("Empty expression")
+    node = _Parser(tokens, set(columns)).parse()
+    
+    def evaluate(df):
+        try:
+            return np.broadcast_to(_mask(node(df)), (len(df),))
+        except (TypeError, ValueError) as e:
+            # e.g. comparing a text field such as sector with a number
+            raise ScreenerError(f"Cannot evaluate {expression!r}: {e}")
+    
+    return evaluate
+
+
+def screen(snapshot, expression):
+    """Rows of the snapshot matching the expression, evaluated as vectorized boolean masks"""
+    if snapshot.empty:
+        return snapshot
+    mask = compile_expression(expression, snapshot.columns)(snapshot)
+    return snapshot[mask]
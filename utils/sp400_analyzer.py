@@ -1,21 +1,29 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import yfinance as yf
 import numpy as np
 from datetime import datetime, timedelta
 import streamlit as st
 import re
+import time
+import logging
+from utils.price_store import PriceStore
+from utils.fetch_executor import FetchExecutor
+from utils.constituent_registry import get_registry, INDEX_URLS
+from utils.fundamentals_cache import FundamentalsCache
+from utils.symbols import to_yahoo_symbol
+from utils.providers import get_provider
+from utils.scan_checkpoint import ScanCheckpoint
 
 class Russell1000Analyzer:
     """Analyzer for Russell 1000 companies and their likelihood of S&P 500 inclusion"""
     
-    def __init__(self):
-        self.russell_url = "https://en.wikipedia.org/wiki/Russell_1000_Index"
-        self.sp500_url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+    def __init__(self, max_workers=None, chunk_size=100):
+        self.store = PriceStore()
+        self.executor = FetchExecutor(max_workers=max_workers)
+        self.chunk_size = chunk_size
+        self.fundamentals = FundamentalsCache()
+        self.registry = get_registry()
+        self.funnel_report = []
+        self.russell_url = INDEX_URLS['Russell 1000']
         
         # S&P 500 inclusion criteria (current as of 2024/2025)
         self.sp500_criteria = {
@@ -25,6 +33,17 @@ class Russell1000Analyzer:
             'min_liquidity_ratio': 0.75,  # annual volume / float-adjusted market cap
             'profitability_quarters': 4  # positive earnings for trailing 4 quarters
         }
+        
+        # Companies whose quick market-cap estimate is more than this fraction under
+        # the floor are dropped before their full fundamentals are fetched
+        self.prefilter_margin = 0.1
+        
+        # ticker.info fields used by the inclusion metrics
+        self.info_fields = [
+            'marketCap', 'revenueGrowth', 'profitMargins', 'returnOnEquity', 'debtToEquity',
+            'freeCashflow', 'trailingPE', 'forwardPE', 'priceToBook', 'enterpriseValue',
+            'earningsGrowth', 'sharesOutstanding', 'floatShares', 'country'
+        ]
     
     def get_sp500_companies(self):
         """
@@ -32,35 +51,12 @@ class Russell1000Analyzer:
         Returns set of symbols
         """
         try:
-            response = requests.get(self.sp500_url, headers=self.headers, timeout=15)
-            response.raise_for_status()
+            sp500_symbols = {to_yahoo_symbol(s, 'S&P 500') for s in self.registry.get_sp500_symbols()}
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find the main table with S&P 500 company data
-            table = soup.find('table', class_='wikitable')
-            
-            if not table:
+            if not sp500_symbols:
                 st.error("Could not find S&P 500 companies table")
                 return set()
             
-            sp500_symbols = set()
-            rows = table.find_all('tr')[1:]  # Skip header row
-            
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 1:
-                    try:
-                        symbol = cells[0].get_text().strip()
-                        # Clean the symbol
-                        symbol = re.sub(r'[^\w.-]', '', symbol)
-                        
-                        if symbol:
-                            sp500_symbols.add(symbol)
-                            
-                    except Exception as e:
-                        continue  # Skip problematic rows
-            
             print(f"Found {len(sp500_symbols)} S&P 500 companies")
             return sp500_symbols
             
@@ -74,10 +70,7 @@ class Russell1000Analyzer:
         Returns DataFrame with company information
         """
         try:
-            response = requests.get(self.russell_url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.registry.get_page(self.russell_url)
             
             # Find the components table - look for the table with Company/Symbol headers
             tables = soup.find_all('table', class_='wikitable')
@@ -108,7 +101,7 @@ class Russell1000Analyzer:
                         gics_sub_industry = cells[3].get_text().strip() if len(cells) > 3 else ""
                         
                         # Clean the data
-                        symbol = re.sub(r'[^\w.-]', '', symbol)
+                        symbol = to_yahoo_symbol(symbol, 'Russell 1000')
                         company_name = re.sub(r'\[.*?\]', '', company_name).strip()
                         
                         if symbol and company_name:
@@ -133,6 +126,14 @@ class Russell1000Analyzer:
     def get_sp500_candidates(self, max_companies=30):
         """
         Get Russell 1000 companies, filter out current S&P 500, and analyze for S&P 500 inclusion likelihood
+        
+        Candidates go through a staged funnel: a cheap market-cap screen, then full
+        fundamentals, then volume history and scoring. Only companies at or above the
+        market-cap floor reach the later, more expensive stages. Per-stage counts and
+        timings are kept in self.funnel_report. Scored and rejected companies are
+        checkpointed, so an interrupted scan resumes with the companies it has not
+        processed yet; companies that failed with an error are retried.
+        
         Returns DataFrame with scores and financial metrics
         """
         # Get Russell 1000 companies
@@ -153,42 +154,100 @@ class Russell1000Analyzer:
             return pd.DataFrame()
         
         candidates = []
+        self.funnel_report = []
         
         # Process companies in batches to avoid overwhelming the API
         symbols = candidates_df['Symbol'].tolist()[:max_companies]  # Limit for performance
         
-        for symbol in symbols:
-            try:
-                company_data = candidates_df[candidates_df['Symbol'] == symbol].iloc[0]
-                
-                # Get financial data
-                financial_metrics = self._get_financial_metrics(symbol)
-                
-                if financial_metrics:
-                    # Calculate inclusion score
-                    score, criteria_met = self._calculate_inclusion_score(financial_metrics)
-                    
-                    candidate = {
-                        'Symbol': symbol,
-                        'Company': company_data['Company'],
-                        'GICS_Sector': company_data['GICS_Sector'],
-                        'Market_Cap_B': financial_metrics.get('market_cap', 0) / 1e9,
-                        'Revenue_Growth_TTM': financial_metrics.get('revenue_growth', 0),
-                        'Profit_Margin': financial_metrics.get('profit_margin', 0),
-                        'ROE': financial_metrics.get('roe', 0),
-                        'Debt_to_Equity': financial_metrics.get('debt_to_equity', 0),
-                        'Free_Cash_Flow_B': financial_metrics.get('free_cash_flow', 0) / 1e9,
-                        'Average_Volume_M': financial_metrics.get('avg_volume', 0) / 1e6,
-                        'Inclusion_Score': score,
-                        'criteria_met': criteria_met,
-                        'Score_Components': financial_metrics.get('score_breakdown', {})
-                    }
+        # Resume an interrupted scan of the same companies and criteria from today
+        end_date = datetime.now()
+        checkpoint = ScanCheckpoint(
+            'sp500_candidates',
+            symbols,
+            {'criteria': self.sp500_criteria, 'prefilter_margin': self.prefilter_margin},
+            end_date.date()
+        )
+        stage_start = time.perf_counter()
+        done = checkpoint.load()
+        if done:
+            candidates = [candidate for candidate in done.values() if candidate is not None]
+            self._record_stage('Resumed from checkpoint', list(done), candidates, stage_start)
+        remaining = [s for s in symbols if s not in done]
+        
+        # Stage 1: cheap market-cap screen, pruning companies well under the floor
+        stage_start = time.perf_counter()
+        market_caps = self._get_quick_market_caps(remaining)
+        prefilter_floor = self.sp500_criteria['min_market_cap'] * (1 - self.prefilter_margin)
+        survivors = [s for s in remaining if market_caps.get(s) is None or market_caps[s] >= prefilter_floor]
+        checkpoint.record({s: None for s in remaining if s not in survivors})
+        self._record_stage('Market cap screen', remaining, survivors, stage_start)
+        
+        # Stage 2: full fundamentals for the survivors, read from the cache or fetched concurrently
+        stage_start = time.perf_counter()
+        screened = survivors
+        infos = {}
+        rejected = []
+        for symbol, info in self.fundamentals.iter_info(screened, self.info_fields, self.executor):
+            if info.get('marketCap', 0) >= self.sp500_criteria['min_market_cap']:
+                infos[symbol] = info
+            else:
+                rejected.append(symbol)
+        survivors = [s for s in screened if s in infos]
+        # Companies whose fetch failed are left out of the checkpoint so a resumed scan retries them
+        checkpoint.record({s: None for s in rejected})
+        self._record_stage('Fundamentals', screened, survivors, stage_start)
+        
+        # Stage 3: a year of volume history for the remaining companies, in batched downloads
+        stage_start = time.perf_counter()
+        scored = []
+        for chunk_start in range(0, len(survivors), self.chunk_size):
+            chunk = survivors[chunk_start:chunk_start + self.chunk_size]
+            histories = self.store.get_many(chunk, end_date - timedelta(days=365), end_date)
+            processed = {}
+            
+            for symbol in chunk:
+                try:
+                    company_data = candidates_df[candidates_df['Symbol'] == symbol].iloc[0]
                     
-                    candidates.append(candidate)
+                    # Get financial data
+                    financial_metrics = self._get_financial_metrics(symbol, histories.get(symbol), infos[symbol])
                     
-            except Exception as e:
-                print(f"Error analyzing {symbol}: {str(e)}")
-                continue
+                    if financial_metrics:
+                        # Calculate inclusion score
+                        score, criteria_met = self._calculate_inclusion_score(financial_metrics)
+                        
+                        candidate = {
+                            'Symbol': symbol,
+                            'Company': company_data['Company'],
+                            'GICS_Sector': company_data['GICS_Sector'],
+                            'Market_Cap_B': financial_metrics.get('market_cap', 0) / 1e9,
+                            'Revenue_Growth_TTM': financial_metrics.get('revenue_growth', 0),
+                            'Profit_Margin': financial_metrics.get('profit_margin', 0),
+                            'ROE': financial_metrics.get('roe', 0),
+                            'Debt_to_Equity': financial_metrics.get('debt_to_equity', 0),
+                            'Free_Cash_Flow_B': financial_metrics.get('free_cash_flow', 0) / 1e9,
+                            'Average_Volume_M': financial_metrics.get('avg_volume', 0) / 1e6,
+                            'Inclusion_Score': score,
+                            'criteria_met': criteria_met,
+                            'Score_Components': financial_metrics.get('score_breakdown', {})
+                        }
+                        
+                        scored.append(candidate)
+                        processed[symbol] = candidate
+                        
+                except Exception as e:
+                    print(f"Error analyzing {symbol}: {str(e)}")
+                    continue
+            
+            # Companies without price history are final; other failures may be transient and are retried
+            unscored = [symbol for symbol in chunk if symbol not in processed]
+            processed.update(dict.fromkeys(self.store.negative_cache.known_bad(unscored)))
+            checkpoint.record(processed)
+        
+        candidates.extend(scored)
+        checkpoint.complete()
+        
+        self._record_stage('Volume history & scoring', survivors, scored, stage_start)
         
         # Convert to DataFrame and sort by score
         candidates_df = pd.DataFrame(candidates)
@@ -197,14 +256,58 @@ class Russell1000Analyzer:
         
         return candidates_df
     
-    def _get_financial_metrics(self, symbol):
+    def _get_quick_market_caps(self, symbols):
+        """
+        Get an approximate market cap for each symbol as cheaply as possible
+        
+        Uses a fresh cached market cap where there is one, otherwise the
+        lightweight fast_info lookup, fetched concurrently.
+        
+        Returns:
+            Dict of symbol -> market cap (symbols whose lookup failed are omitted)
+        """
+        cached = self.fundamentals.get_many(symbols, ['marketCap'])
+        market_caps = {symbol: values.get('marketCap') for symbol, values in cached.items()}
+        
+        missing = [symbol for symbol in symbols if symbol not in cached]
+        fetched = {}
+        for symbol, fast_info, error in self.executor.map_as_completed(get_provider().fast_info, missing):
+            if error is not None:
+                continue
+            try:
+                market_cap = fast_info['marketCap']
+                shares = fast_info['shares']
+            except Exception as e:
+                continue
+            
+            if market_cap:
+                market_caps[symbol] = market_cap
+                fetched[symbol] = {'marketCap': market_cap, 'sharesOutstanding': shares}
+        
+        self.fundamentals.put_many(fetched)
+        return market_caps
+    
+    def _record_stage(self, stage, inputs, outputs, stage_start):
+        """Record the size and duration of one funnel stage"""
+        seconds = time.perf_counter() - stage_start
+        self.funnel_report.append({
+            'Stage': stage,
+            'Input': len(inputs),
+            'Output': len(outputs),
+            'Seconds': round(seconds, 2)
+        })
+        logging.info(f"{stage}: {len(inputs)} -> {len(outputs)} companies in {seconds:.2f}s")
+    
+    def _get_financial_metrics(self, symbol, hist=None, info=None):
         """Get key financial metrics for a company using yfinance"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            if info is None:
+                info = self.fundamentals.get_info(symbol, self.info_fields)
             
-            # Get historical data for volume analysis
-            hist = ticker.history(period="1y")
+            # Get historical data for volume analysis from the local price store
+            if hist is None:
+                end_date = datetime.now()
+                hist = self.store.get_history(symbol, end_date - timedelta(days=365), end_date)
             
             if info and not hist.empty:
                 metrics = {
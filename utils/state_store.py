@@ -0,0 +1,44 @@
+import os
+import pickle
+import logging
+import threading
+
+from utils.cache_paths import atomic_write
+
+
+# Streamlit sessions are threads of one process; serialize read-modify-write per file
+_merge_locks = {}
+_merge_locks_guard = threading.Lock()
+
+
+class PickleStateStore:
+    """Persists a dict of per-symbol indicator states to one pickle file, replaced atomically"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Could not read indicator state from {self.path}: {e}")
+            return {}
+    
+    def save(self, states):
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(states, f)
+        
+        atomic_write(self.path, write)
+    
+    def merge(self, states):
+        """Save states over the stored ones, keeping symbols this caller did not touch"""
+        with _merge_locks_guard:
+            lock = _merge_locks.setdefault(self.path, threading.Lock())
+        with lock:
+            stored = self.load()
+            stored.update(states)
+            self.save(stored)
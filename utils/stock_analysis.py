@@ -1,14 +1,14 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import streamlit as st
+from utils.price_store import PriceStore
 
 class StockAnalyzer:
     """Analyzer for stock performance around S&P 500 changes"""
     
     def __init__(self):
-        pass
+        self.store = PriceStore()
     
     def get_performance_data(self, symbols, announcement_date, start_date, end_date):
         """
@@ -63,15 +63,8 @@ class StockAnalyzer:
             buffer_start = start_date - timedelta(days=10)
             buffer_end = end_date + timedelta(days=10)
             
-            # Download data
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(
-                start=buffer_start,
-                end=buffer_end,
-                auto_adjust=True,  # Adjust for splits and dividends
-                back_adjust=True,
-                actions=False  # Don't include dividends and splits columns
-            )
+            # Read from the local price store, downloading only missing bars
+            data = self.store.get_history(symbol, buffer_start, buffer_end)
             
             if data.empty:
                 print(f"No data returned for {symbol}")
@@ -82,6 +75,7 @@ class StockAnalyzer:
             price_data.columns = ['Price']
             
             # Reset index to make Date a column
+            price_data.index.name = 'Date'
             price_data = price_data.reset_index()
             
             # Ensure Date column is datetime
@@ -0,0 +1,72 @@
+import re
+
+# Yahoo exchange suffixes for Eurostoxx constituents, matched against the
+# listing exchange or, failing that, the country of the company's head office.
+EUROSTOXX_SUFFIXES = [
+    ('xetra', '.DE'),
+    ('frankfurt', '.DE'),
+    ('germany', '.DE'),
+    ('paris', '.PA'),
+    ('france', '.PA'),
+    ('amsterdam', '.AS'),
+    ('netherlands', '.AS'),
+    ('luxembourg', '.AS'),
+    ('milan', '.MI'),
+    ('borsa italiana', '.MI'),
+    ('italy', '.MI'),
+    ('madrid', '.MC'),
+    ('spain', '.MC'),
+    ('brussels', '.BR'),
+    ('belgium', '.BR'),
+    ('helsinki', '.HE'),
+    ('finland', '.HE'),
+    ('dublin', '.IR'),
+    ('ireland', '.IR'),
+    ('lisbon', '.LS'),
+    ('portugal', '.LS'),
+    ('vienna', '.VI'),
+    ('austria', '.VI'),
+]
+
+YAHOO_EXCHANGE_SUFFIXES = {suffix for _, suffix in EUROSTOXX_SUFFIXES} | {'.L'}
+
+
+def to_yahoo_symbol(symbol, index_name, listing_hint=None):
+    """
+    Convert a ticker as written on Wikipedia into the symbol Yahoo Finance uses
+    
+    Args:
+        symbol: Ticker from the index constituents table
+        index_name: Index the ticker was scraped for (e.g. 'S&P 500', 'FTSE 100')
+        listing_hint: Listing exchange or country text, used to pick a Eurostoxx suffix
+    
+    Returns:
+        Yahoo symbol, e.g. BRK.B -> BRK-B, BT.A -> BT-A.L, ADS (Germany) -> ADS.DE
+    """
+    symbol = re.sub(r'\[.*?\]', '', symbol).strip().upper()
+    symbol = re.sub(r'[^\w.-]', '', symbol)
+    if not symbol:
+        return symbol
+    
+    if index_name in ('S&P 500', 'Nasdaq 100', 'Russell 1000'):
+        # Yahoo writes share classes with a dash (BRK-B, BF-B)
+        return symbol.replace('.', '-')
+    
+    if index_name == 'FTSE 100':
+        if symbol.endswith('.L'):
+            symbol = symbol[:-2]
+        symbol = symbol.rstrip('.').replace('.', '-')
+        return f"{symbol}.L"
+    
+    if index_name == 'Eurostoxx':
+        if any(symbol.endswith(suffix) for suffix in YAHOO_EXCHANGE_SUFFIXES):
+            return symbol
+        
+        hint = (listing_hint or '').lower()
+        for keyword, suffix in EUROSTOXX_SUFFIXES:
+            if keyword in hint:
+                return f"{symbol}{suffix}"
+        
+        return symbol
+    
+    return symbol
@@ -0,0 +1,157 @@
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_paths import cache_path, atomic_write
+
+# Pandas period frequency per timeframe; weekly bars end on Friday
+TIMEFRAMES = {
+    'Daily': None,
+    'Weekly': 'W-FRI',
+    'Monthly': 'M',
+}
+
+# Approximate calendar days per bar, for sizing lookback windows
+TIMEFRAME_DAYS = {
+    'Daily': 1,
+    'Weekly': 7,
+    'Monthly': 31,
+}
+
+
+def resample_closes(closes, timeframe):
+    """
+    Resample a dates × symbols daily close matrix to weekly or monthly closes
+    
+    Every symbol is grouped in one pass by the calendar period of its dates;
+    each bar takes the last close of the period and is labelled with the
+    period's end date. The current period is included while it is still open.
+    """
+    freq = TIMEFRAMES[timeframe]
+    if freq is None or closes.empty:
+        return closes
+    
+    closes = closes.sort_index()
+    resampled = closes.groupby(closes.index.to_period(freq)).last()
+    resampled.index = resampled.index.to_timestamp(how='end').normalize()
+    return resampled
+
+
+def label_open_period(resampled, last_date):
+    """
+    Label the bar of the still-open period with its last trading day
+    
+    Bars are cached under their period end, which for the open period is a
+    date in the future; crosses on that bar should carry the date of the
+    close they were computed from.
+    """
+    if resampled.empty:
+        return resampled
+    
+    resampled = resampled.sort_index()
+    last_date = pd.Timestamp(last_date).normalize()
+    if resampled.index[-1] > last_date:
+        resampled = resampled.rename(index={resampled.index[-1]: last_date})
+    return resampled
+
+
+class ResampledCloseCache:
+    """
+    Resampled closes for one timeframe, kept in a single Parquet file.
+    
+    Completed weekly and monthly bars never change, so after the first scan
+    only daily bars from the last complete period onwards are needed: that
+    period's close is checked against the cache (a mismatch means the price
+    history was re-adjusted and the symbol is rebuilt in full) and the open
+    period is replaced.
+    """
+    
+    def __init__(self, timeframe, path=None):
+        self.timeframe = timeframe
+        self.path = path or cache_path('resampled', f"{timeframe.lower()}.parquet")
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        try:
+            return pd.read_parquet(self.path)
+        except Exception as e:
+            logging.warning(f"Could not read resampled {self.timeframe.lower()} closes: {e}")
+            return pd.DataFrame()
+    
+    def save(self, resampled):
+        atomic_write(self.path, resampled.to_parquet)
+    
+    def daily_starts(self, symbols, full_start):
+        """
+        First daily bar needed per symbol to bring its resampled closes up to date
+        
+        Args:
+            symbols: Symbols to scan
+            full_start: Start date for symbols without enough cached history
+        
+        Returns:
+            Dict of symbol -> start date; symbols cached back to `full_start`
+            only need the daily bars of their last two periods
+        """
+        cached = self.load()
+        full_start = pd.Timestamp(full_start)
+        freq = TIMEFRAMES[self.timeframe]
+        
+        starts = {}
+        for symbol in symbols:
+            series = cached[symbol].dropna() if symbol in cached else pd.Series(dtype=float)
+            # Bars are labelled with their period end, so compare the start of the first period
+            if len(series) < 2 or series.index[0].to_period(freq).start_time > full_start:
+                starts[symbol] = full_start
+            else:
+                starts[symbol] = series.index[-2].to_period(freq).start_time
+        
+        return starts
+    
+    def update(self, daily, incremental=()):
+        """
+        Resample daily closes and merge them into the cache
+        
+        Args:
+            daily: DataFrame of daily closes, indexed by date with one column per symbol
+            incremental: Symbols whose daily closes only cover their last cached periods
+        
+        Returns:
+            Tuple of (resampled closes for the symbols in `daily`, list of
+            incremental symbols whose cached bars no longer match and must be
+            reloaded from their full start)
+        """
+        fresh = resample_closes(daily, self.timeframe)
+        cached = self.load()
+        
+        stale = []
+        for symbol in incremental:
+            if symbol not in fresh or symbol not in cached:
+                stale.append(symbol)
+                continue
+            series = fresh[symbol].dropna()
+            if series.empty:
+                stale.append(symbol)
+                continue
+            # The first fresh bar is a complete period the cache already holds
+            first_date = series.index[0]
+            cached_close = cached[symbol].get(first_date, np.nan)
+            if not np.isclose(series.iloc[0], cached_close, rtol=1e-6):
+                stale.append(symbol)
+        
+        fresh = fresh.drop(columns=stale)
+        full = [symbol for symbol in fresh.columns if symbol not in incremental]
+        if not cached.empty:
+            # Symbols rebuilt in full drop their old bars; incremental ones keep them
+            cached = cached.drop(columns=[symbol for symbol in full if symbol in cached])
+        merged = fresh.combine_first(cached) if not cached.empty else fresh
+        
+        try:
+            self.save(merged)
+        except Exception as e:
+            logging.warning(f"Could not store resampled {self.timeframe.lower()} closes: {e}")
+        
+        return merged[list(fresh.columns)].dropna(how='all'), stale